@@ -1,5 +1,17 @@
 from django.apps import AppConfig
+from django.core.signals import request_finished, request_started
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .db import (apply_sqlite_pragmas, check_connection_health,
+                         optimize_sqlite)
+        from .slowlog import flush_slow_queries_periodically
+
+        connection_created.connect(apply_sqlite_pragmas)
+        request_started.connect(check_connection_health)
+        request_finished.connect(optimize_sqlite)
+        request_finished.connect(flush_slow_queries_periodically)
@@ -0,0 +1,118 @@
+import csv
+
+from django.db import models, router, transaction
+
+BULK_CHUNK_SIZE: int = 2000
+SUPPORTED_ON_DELETE = (models.CASCADE, models.SET_NULL, models.DO_NOTHING)
+
+
+def iter_pk_chunks(queryset, chunk_size=BULK_CHUNK_SIZE):
+    """Отдаёт первичные ключи queryset списками по chunk_size.
+
+    Каждый список — отдельный запрос по индексу первичного ключа
+    (pk > последний из прошлого списка), так что в памяти никогда
+    не бывает больше chunk_size ключей, а строки, изменённые
+    предыдущими порциями, не сдвигают следующие.
+    """
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    last_pk = None
+    while True:
+        chunk = pks if last_pk is None else pks.filter(pk__gt=last_pk)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1]
+
+
+def bulk_update(queryset, values, chunk_size=BULK_CHUNK_SIZE, progress=None):
+    """UPDATE строк queryset порциями, без загрузки объектов.
+
+    Сигналы save() не отправляются. progress(обработано) вызывается
+    после каждой порции. Возвращает число обновлённых строк.
+    """
+    model = queryset.model
+    done = 0
+    for pks in iter_pk_chunks(queryset, chunk_size):
+        done += model._base_manager.filter(pk__in=pks).update(**values)
+        if progress is not None:
+            progress(done)
+    return done
+
+
+def bulk_delete(queryset, chunk_size=BULK_CHUNK_SIZE, progress=None):
+    """DELETE строк queryset порциями, без загрузки объектов.
+
+    В отличие от QuerySet.delete() зависимые строки (on_delete=CASCADE
+    и SET_NULL) обрабатываются запросами по списку ключей, а не через
+    загрузку каждого объекта в Collector. Другие on_delete
+    не поддерживаются: они проверяются до удаления первой строки.
+    Сигналы удаления не отправляются. Возвращает число удалённых
+    строк queryset.
+    """
+    model = queryset.model
+    check_on_delete(model)
+    using = router.db_for_write(model)
+    done = 0
+    for pks in iter_pk_chunks(queryset, chunk_size):
+        with transaction.atomic(using=using):
+            delete_cascade(model, pks, using)
+        done += len(pks)
+        if progress is not None:
+            progress(done)
+    return done
+
+
+def related_objects(model):
+    """Обратные связи ForeignKey и OneToOneField на model."""
+    return [
+        relation for relation in model._meta.get_fields(include_hidden=True)
+        if relation.auto_created and not relation.concrete
+        and (relation.one_to_many or relation.one_to_one)
+    ]
+
+
+def check_on_delete(model, seen=None):
+    """NotImplementedError, если удаление model затронет связь
+    с on_delete, которую не умеет delete_cascade."""
+    seen = set() if seen is None else seen
+    seen.add(model)
+    for relation in related_objects(model):
+        if relation.on_delete not in SUPPORTED_ON_DELETE:
+            raise NotImplementedError(
+                f'{relation.related_model.__name__}.{relation.field.name}: '
+                f'on_delete={relation.on_delete.__name__} не поддерживается'
+            )
+        if (
+            relation.on_delete is models.CASCADE
+            and relation.related_model not in seen
+        ):
+            check_on_delete(relation.related_model, seen)
+
+
+def delete_cascade(model, pks, using):
+    for relation in related_objects(model):
+        related = relation.related_model._base_manager.using(using).filter(
+            **{f'{relation.field.name}__in': pks}
+        )
+        if relation.on_delete is models.CASCADE:
+            for related_pks in iter_pk_chunks(related):
+                delete_cascade(relation.related_model, related_pks, using)
+        elif relation.on_delete is models.SET_NULL:
+            related.update(**{relation.field.name: None})
+    model._base_manager.using(using).filter(pk__in=pks)._raw_delete(using)
+
+
+class Echo:
+    """Файлоподобный объект, возвращающий записанное вместо хранения."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(header, rows):
+    """Строки CSV по одной — для StreamingHttpResponse."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
@@ -0,0 +1,100 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+
+def page_cache():
+    return caches[settings.CACHE_MIDDLEWARE_ALIAS]
+
+
+def generation_key(scope):
+    return f'public_page.generation.{scope}'
+
+
+def invalidate_public_pages(*scopes):
+    """Сбрасывает закэшированные страницы областей scopes.
+
+    Страницы не удаляются, а перестают находиться: в ключ кэша входит
+    номер поколения области, который здесь увеличивается.
+    """
+    cache = page_cache()
+    for scope in scopes:
+        try:
+            cache.incr(generation_key(scope))
+        except ValueError:
+            cache.set(generation_key(scope), 1, None)
+
+
+def public_cache_key(key_prefix, scope, request):
+    generation = page_cache().get(generation_key(scope), 0)
+    url_hash = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f'public_page.{key_prefix}.{generation}.{url_hash}'
+
+
+def is_public_cacheable(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+    )
+
+
+def is_public_page(request):
+    """Ответ на запрос общий и кэшируется cache_public_page: для гостей
+    или для всех, если персональные части вынесены во фрагменты."""
+    return (
+        settings.FRAGMENTS_MODE != 'inline'
+        or not request.user.is_authenticated
+    )
+
+
+def cache_public_page(timeout, key_prefix='', scope=None):
+    """Кэширует страницу целиком только для анонимных пользователей.
+
+    Анонимный вариант одинаков для всех гостей: он хранится в кэше по URL
+    (без учёта cookie) и отдаётся с `Cache-Control: public` и
+    `Vary: Cookie`, чтобы обратный прокси не показал его вошедшим
+    пользователям. Вошедшие пользователи получают свежую страницу
+    с `Cache-Control: private`.
+
+    Если персональные части страницы вынесены во фрагменты
+    (settings.FRAGMENTS_MODE не 'inline'), страница одинакова для всех,
+    и общий кэш используется и для вошедших пользователей. request.user
+    при этом не читается, чтобы сессия не добавила `Vary: Cookie`.
+
+    scope — функция от аргументов view, возвращающая область страницы
+    для invalidate_public_pages; по умолчанию область — key_prefix.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            shared = settings.FRAGMENTS_MODE != 'inline'
+            if not is_public_page(request):
+                response = view_func(request, *args, **kwargs)
+                patch_cache_control(
+                    response,
+                    private=True,
+                    max_age=settings.PRIVATE_CACHE_MAX_AGE,
+                )
+                patch_vary_headers(response, ('Cookie',))
+                return response
+
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+
+            page_scope = scope(*args, **kwargs) if scope else key_prefix
+            key = public_cache_key(key_prefix, page_scope, request)
+            response = page_cache().get(key)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                if is_public_cacheable(response):
+                    patch_cache_control(response, public=True, max_age=timeout)
+                    if not shared:
+                        patch_vary_headers(response, ('Cookie',))
+                    page_cache().set(key, response, timeout)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.db import connections
+
+_optimize_state = {'last_run': time.monotonic()}
+
+
+def configure_sqlite(dbapi_connection):
+    """Выполняет settings.SQLITE_PRAGMAS на соединении sqlite3."""
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        dbapi_connection.execute(f'PRAGMA {name} = {value}')
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Настраивает каждое новое соединение Django с SQLite."""
+    if connection.vendor == 'sqlite':
+        configure_sqlite(connection.connection)
+
+
+def optimize_sqlite(**kwargs):
+    """Раз в SQLITE_OPTIMIZE_INTERVAL секунд выполняет PRAGMA optimize.
+
+    Постоянные соединения живут долго, поэтому обновлять статистику
+    планировщика при закрытии соединения, как советует документация
+    SQLite, недостаточно.
+    """
+    interval = settings.SQLITE_OPTIMIZE_INTERVAL
+    now = time.monotonic()
+    if not interval or now - _optimize_state['last_run'] < interval:
+        return
+    _optimize_state['last_run'] = now
+    for connection in connections.all():
+        if connection.vendor == 'sqlite' and connection.connection is not None:
+            connection.connection.execute('PRAGMA optimize')
+
+
+def check_connection_health(**kwargs):
+    """Закрывает постоянные соединения, которые перестали отвечать.
+
+    Django проверяет соединение только после ошибки в предыдущем запросе,
+    поэтому после перезапуска базы первый запрос каждого воркера падал бы.
+    """
+    if not settings.DB_CONN_HEALTH_CHECKS:
+        return
+    for connection in connections.all():
+        if (
+            connection.connection is not None
+            and connection.settings_dict['CONN_MAX_AGE'] != 0
+            and not connection.is_usable()
+        ):
+            connection.close()
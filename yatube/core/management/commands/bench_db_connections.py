@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время запроса к БД с новым соединением на каждый '
+        'запрос и с постоянным соединением (CONN_MAX_AGE).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Количество имитируемых запросов.',
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Алиас базы данных.',
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        requests = options['requests']
+
+        connection.close()
+        fresh = self.measure(connection, requests, reconnect=True)
+        persistent = self.measure(connection, requests, reconnect=False)
+
+        self.stdout.write(
+            f'{connection.vendor}: {requests} запросов\n'
+            f'  новое соединение:      {fresh * 1000:.3f} мс/запрос\n'
+            f'  постоянное соединение: {persistent * 1000:.3f} мс/запрос\n'
+            f'  открытие соединения:   {(fresh - persistent) * 1000:.3f} '
+            f'мс/запрос'
+        )
+
+    @staticmethod
+    def measure(connection, requests, reconnect):
+        started = time.perf_counter()
+        for _ in range(requests):
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            if reconnect:
+                connection.close()
+        return (time.perf_counter() - started) / requests
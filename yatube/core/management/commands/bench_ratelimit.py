@@ -0,0 +1,45 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from core.ratelimit import client_key, hit
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет накладные расходы core.ratelimit на один запрос '
+        'с текущим кэшем (RATELIMIT_CACHE_ALIAS).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=10000,
+            help='Количество имитируемых запросов.',
+        )
+        parser.add_argument(
+            '--clients', type=int, default=100,
+            help='Количество разных IP-адресов.',
+        )
+
+    def handle(self, *args, **options):
+        requests = options['requests']
+        factory = RequestFactory()
+        clients = []
+        for i in range(options['clients']):
+            address = f'10.0.{i // 256}.{i % 256}'
+            request = factory.post('/', REMOTE_ADDR=address)
+            request.user = AnonymousUser()
+            clients.append(request)
+
+        started = time.perf_counter()
+        for i in range(requests):
+            request = clients[i % len(clients)]
+            hit('bench', client_key(request), requests, 60)
+        elapsed = (time.perf_counter() - started) / requests
+
+        self.stdout.write(
+            f'{requests} запросов, {len(clients)} клиентов: '
+            f'{elapsed * 1000:.4f} мс/запрос'
+        )
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from core.models import SlowQuery
+
+ORDERINGS = {
+    'total': '-total_time',
+    'max': '-max_time',
+    'calls': '-calls',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Самые медленные запросы к базе из журнала SlowQuery, '
+        'сгруппированные по отпечатку SQL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=10,
+            help='Сколько запросов показать.',
+        )
+        parser.add_argument(
+            '--order', choices=ORDERINGS, default='total',
+            help='Сортировка: общее время, наибольшее время или выполнения.',
+        )
+        parser.add_argument(
+            '--plans', action='store_true',
+            help='Показать планы выполнения.',
+        )
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Очистить журнал после вывода отчёта.',
+        )
+
+    def handle(self, *args, **options):
+        queries = SlowQuery.objects.order_by(ORDERINGS[options['order']])
+        for number, query in enumerate(queries[:options['top']], 1):
+            self.stdout.write(
+                f'{number}. {query.calls} выполн., всего '
+                f'{query.total_time * 1000:.1f} мс, в среднем '
+                f'{query.average_time * 1000:.1f} мс, максимум '
+                f'{query.max_time * 1000:.1f} мс\n'
+                f'   {query.view_name or "-"} {query.origin}\n'
+                f'   {query.normalized_sql}'
+            )
+            if options['plans'] and query.plan:
+                for line in query.plan.splitlines():
+                    self.stdout.write(f'     {line}')
+        if options['reset']:
+            SlowQuery.objects.all().delete()
+            self.stdout.write('Журнал очищен')
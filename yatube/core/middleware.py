@@ -0,0 +1,298 @@
+import mimetypes
+import os
+import posixpath
+import re
+from contextlib import ExitStack
+from gzip import GzipFile
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connections
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.utils.text import StreamingBuffer
+from django.views.static import was_modified_since
+
+from . import profiling, slowlog
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^/]+$')
+# кодировка из Accept-Encoding, кроме явно запрещённой через q=0
+ACCEPTS_BR_RE = re.compile(
+    r'\bbr\b(?!\s*;\s*q\s*=\s*0(\.0*)?\s*(,|$))', re.IGNORECASE
+)
+ACCEPTS_GZIP_RE = re.compile(
+    r'\bgzip\b(?!\s*;\s*q\s*=\s*0(\.0*)?\s*(,|$))', re.IGNORECASE
+)
+ENCODINGS = (
+    ('br', '.br', ACCEPTS_BR_RE),
+    ('gzip', '.gz', ACCEPTS_GZIP_RE),
+)
+COMPRESSIBLE_TYPES_RE = re.compile(
+    r'^(text/(?!event-stream)|application/(json|javascript|xml)|image/svg)'
+)
+
+
+class StaticFilesMiddleware:
+    """Раздаёт статику и медиа, когда перед приложением нет веб-сервера.
+
+    Файлы с хэшем в имени (их создаёт CompressedManifestStaticFilesStorage)
+    отдаются с годовым сроком кэширования, для клиентов с поддержкой
+    сжатия выбираются заранее сжатые `.br`/`.gz` версии.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.locations = [
+            (settings.STATIC_URL, settings.STATIC_ROOT),
+            (settings.MEDIA_URL, settings.MEDIA_ROOT),
+        ]
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD'):
+            response = self.serve(request)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request):
+        for prefix, root in self.locations:
+            if prefix and root and request.path.startswith(prefix):
+                path = posixpath.normpath(request.path[len(prefix):])
+                return self.serve_file(request, root, path.lstrip('/'))
+        return None
+
+    def serve_file(self, request, root, path):
+        try:
+            fullpath = safe_join(root, path)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(fullpath):
+            return None
+
+        stat = os.stat(fullpath)
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime,
+            stat.st_size,
+        ):
+            response = HttpResponseNotModified()
+        else:
+            response = self.file_response(request, fullpath)
+            response['Last-Modified'] = http_date(stat.st_mtime)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        patch_cache_control(response, **self.cache_control(root, path))
+        return response
+
+    def file_response(self, request, fullpath):
+        content_type, _ = mimetypes.guess_type(fullpath)
+        accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        filepath, content_encoding = fullpath, None
+        for encoding, suffix, accepts_re in ENCODINGS:
+            if (
+                accepts_re.search(accepted)
+                and os.path.isfile(fullpath + suffix)
+            ):
+                filepath, content_encoding = fullpath + suffix, encoding
+                break
+
+        response = FileResponse(open(filepath, 'rb'))
+        # FileResponse угадывает тип по имени файла, а у сжатых копий
+        # это был бы application/x-gzip.
+        response['Content-Type'] = content_type or 'application/octet-stream'
+        if content_encoding:
+            response['Content-Encoding'] = content_encoding
+        return response
+
+    @staticmethod
+    def cache_control(root, path):
+        if root == settings.MEDIA_ROOT:
+            return {'public': True, 'max_age': settings.MEDIA_MAX_AGE}
+        if HASHED_NAME_RE.search(path):
+            return {
+                'public': True,
+                'max_age': settings.STATIC_MAX_AGE,
+                'immutable': True,
+            }
+        return {'public': True, 'max_age': settings.STATIC_UNHASHED_MAX_AGE}
+
+
+class CompressionMiddleware:
+    """Сжимает ответы brotli или gzip.
+
+    Ответы короче settings.COMPRESSION_MIN_SIZE отдаются как есть.
+    Потоковые ответы сжимаются по частям со сбросом буфера после каждой
+    части, чтобы клиент получал начало страницы сразу.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not settings.COMPRESSION_ENABLED:
+            return response
+        return self.compress(request, response)
+
+    def compress(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        if not COMPRESSIBLE_TYPES_RE.match(response.get('Content-Type', '')):
+            return response
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.choose_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = STREAM_COMPRESSORS[encoding](
+                response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            compressed = COMPRESSORS[encoding](response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def choose_encoding(request):
+        accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is not None and ACCEPTS_BR_RE.search(accepted):
+            return 'br'
+        if ACCEPTS_GZIP_RE.search(accepted):
+            return 'gzip'
+        return None
+
+
+class EdgeSideIncludesMiddleware:
+    """Просит обратный прокси обработать <esi:include> в HTML-страницах.
+
+    Работает только при settings.FRAGMENTS_MODE = 'esi'.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            settings.FRAGMENTS_MODE == 'esi'
+            and response.get('Content-Type', '').startswith('text/html')
+        ):
+            response['Surrogate-Control'] = 'content="ESI/1.0"'
+        return response
+
+
+class ProfilingMiddleware:
+    """Снимает профиль запроса по просьбе сотрудника (core.profiling).
+
+    Должен стоять после AuthenticationMiddleware. Потоковый ответ
+    дочитывается внутри профиля, иначе рендер ленты в него не попал бы.
+    Имя сохранённого файла возвращается в заголовке X-Profile-Id.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = profiling.requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+
+        capture = profiling.Capture(mode)
+        try:
+            capture.start()
+        except ValueError:
+            # профилировщик уже занят запросом из другого потока
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+            if response.streaming:
+                response.streaming_content = [
+                    b''.join(response.streaming_content)
+                ]
+        finally:
+            capture.stop()
+        match = request.resolver_match
+        label = match.view_name if match else request.path
+        response['X-Profile-Id'] = capture.save(label)
+        return response
+
+
+class SlowQueryLogMiddleware:
+    """Собирает запросы к базе дольше settings.SLOW_QUERY_THRESHOLD
+    секунд (None — выключено) в журнал процесса; в core.models.SlowQuery
+    он пишется после ответа (core.slowlog.flush_slow_queries_periodically).
+
+    Запросы из тела потокового ответа выполняются уже после
+    middleware и в журнал не попадают.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if settings.SLOW_QUERY_THRESHOLD is None:
+            return self.get_response(request)
+
+        log = slowlog.QueryLog(request)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(log))
+            response = self.get_response(request)
+        log.finish()
+        return response
+
+
+def gzip_string(data):
+    buffer = StreamingBuffer()
+    with GzipFile(mode='wb', compresslevel=6, fileobj=buffer, mtime=0) as f:
+        f.write(data)
+    return buffer.read()
+
+
+def gzip_sequence(sequence):
+    buffer = StreamingBuffer()
+    with GzipFile(mode='wb', compresslevel=6, fileobj=buffer, mtime=0) as f:
+        yield buffer.read()
+        for chunk in sequence:
+            f.write(chunk)
+            f.flush()
+            yield buffer.read()
+    yield buffer.read()
+
+
+def brotli_string(data):
+    return brotli.compress(data, quality=5)
+
+
+def brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=5)
+    for chunk in sequence:
+        yield compressor.process(chunk) + compressor.flush()
+    yield compressor.finish()
+
+
+COMPRESSORS = {'gzip': gzip_string, 'br': brotli_string}
+STREAM_COMPRESSORS = {'gzip': gzip_sequence, 'br': brotli_sequence}
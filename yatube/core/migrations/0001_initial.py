@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40, unique=True, verbose_name='Отпечаток')),
+                ('normalized_sql', models.TextField(verbose_name='Запрос без значений')),
+                ('sql', models.TextField(verbose_name='Самый медленный запрос')),
+                ('plan', models.TextField(blank=True, verbose_name='План выполнения')),
+                ('view_name', models.CharField(blank=True, max_length=200, verbose_name='Представление')),
+                ('origin', models.CharField(blank=True, max_length=300, verbose_name='Место вызова')),
+                ('calls', models.PositiveIntegerField(default=0, verbose_name='Выполнений')),
+                ('total_time', models.FloatField(default=0, verbose_name='Общее время, с')),
+                ('max_time', models.FloatField(default=0, verbose_name='Наибольшее время, с')),
+                ('last_seen', models.DateTimeField(verbose_name='Последнее выполнение')),
+            ],
+            options={
+                'verbose_name': 'медленный запрос',
+                'verbose_name_plural': 'медленные запросы',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """Медленные запросы к базе, сгруппированные по отпечатку SQL.
+
+    Заполняется core.middleware.SlowQueryLogMiddleware; view_name,
+    origin, sql и plan относятся к самому медленному выполнению.
+    """
+    fingerprint = models.CharField('Отпечаток', max_length=40, unique=True)
+    normalized_sql = models.TextField('Запрос без значений')
+    sql = models.TextField('Самый медленный запрос')
+    plan = models.TextField('План выполнения', blank=True)
+    view_name = models.CharField('Представление', max_length=200, blank=True)
+    origin = models.CharField('Место вызова', max_length=300, blank=True)
+    calls = models.PositiveIntegerField('Выполнений', default=0)
+    total_time = models.FloatField('Общее время, с', default=0)
+    max_time = models.FloatField('Наибольшее время, с', default=0)
+    last_seen = models.DateTimeField('Последнее выполнение')
+
+    class Meta:
+        verbose_name = 'медленный запрос'
+        verbose_name_plural = 'медленные запросы'
+
+    def __str__(self):
+        return self.normalized_sql[:80]
+
+    @property
+    def average_time(self):
+        return self.total_time / self.calls if self.calls else 0
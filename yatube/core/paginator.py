@@ -0,0 +1,201 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+APPROXIMATE_COUNT_THRESHOLD: int = 100_000
+
+
+def encode_cursor(values):
+    """Упаковывает значения ключа сортировки в строку для URL."""
+    payload = json.dumps([
+        value.isoformat() if isinstance(value, (date, datetime)) else value
+        for value in values
+    ])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, fields):
+    """Распаковывает курсор; для испорченного курсора возвращает None."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(fields):
+            return None
+        return [
+            field.to_python(value) for field, value in zip(fields, values)
+        ]
+    except (ValueError, TypeError, binascii.Error, ValidationError):
+        return None
+
+
+def keyset_filter(ordering, values, newer=False):
+    """Условие «строка идёт после values» для сортировки ordering.
+
+    Для ordering=('-pub_date', '-pk') это
+    pub_date < v1 OR (pub_date = v1 AND pk < v2).
+    С newer=True условие обратное — строки до курсора.
+    """
+    condition = Q()
+    equal = Q()
+    for name, value in zip(ordering, values):
+        descending = name.startswith('-')
+        field = name.lstrip('-')
+        lookup = 'lt' if descending != newer else 'gt'
+        condition |= equal & Q(**{f'{field}__{lookup}': value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+class KeysetPaginator:
+    """Постраничный вывод по курсору вместо OFFSET.
+
+    Каждая страница — один запрос по индексу сортировки, стоимость
+    не растёт с номером страницы и не требует COUNT(*).
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-pk',)):
+        self.queryset = queryset.order_by(*ordering)
+        self.per_page = per_page
+        self.ordering = ordering
+        opts = queryset.model._meta
+        self.fields = [
+            opts.pk if name.lstrip('-') == 'pk'
+            else opts.get_field(name.lstrip('-'))
+            for name in ordering
+        ]
+
+    def get_page(self, cursor=None):
+        queryset = self.queryset
+        values = decode_cursor(cursor, self.fields) if cursor else None
+        if values is not None:
+            queryset = queryset.filter(keyset_filter(self.ordering, values))
+
+        object_list = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(object_list) > self.per_page:
+            object_list = object_list[:self.per_page]
+            next_cursor = self.cursor_for(object_list[-1])
+        return KeysetPage(object_list, next_cursor)
+
+    def cursor_for(self, obj):
+        return encode_cursor(
+            [getattr(obj, field.attname) for field in self.fields]
+        )
+
+
+class CountQuerySetPaginator(Paginator):
+    """Paginator, который считает строки отдельным запросом count_queryset.
+
+    Нужен, когда object_list аннотирован подзапросами: Django завернул бы
+    его целиком в SELECT COUNT(*) FROM (...) и выполнил подзапросы для
+    каждой строки таблицы, а не только для строк текущей страницы.
+    """
+
+    def __init__(self, object_list, per_page, count_queryset, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_queryset = count_queryset
+
+    @cached_property
+    def count(self):
+        return self.count_queryset.count()
+
+
+def estimate_table_rows(model, using):
+    """Оценка числа строк таблицы по статистике планировщика.
+
+    Есть только у PostgreSQL; для остальных баз возвращает None.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] > 0 else None
+
+
+class ApproximateCountPaginator(Paginator):
+    """Paginator, который не считает строки большой таблицы без фильтров.
+
+    Для нефильтрованного queryset по таблице больше
+    APPROXIMATE_COUNT_THRESHOLD строк число берётся из статистики
+    базы вместо SELECT COUNT(*), который читает всю таблицу.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_table_rows(queryset.model, queryset.db)
+            if estimate is not None and estimate > APPROXIMATE_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class QuerySetChain:
+    """Несколько queryset подряд как один список для Paginator.
+
+    Срез читает из каждого queryset только попавшие в него строки,
+    количество — сумма count() частей или count_querysets, если
+    части аннотированы и считать их самих дорого.
+    """
+    ordered = True
+
+    def __init__(self, *querysets, count_querysets=None):
+        self.querysets = querysets
+        self.count_querysets = count_querysets or querysets
+
+    @cached_property
+    def counts(self):
+        return [queryset.count() for queryset in self.count_querysets]
+
+    def count(self):
+        return sum(self.counts)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        items = []
+        for queryset, count in zip(self.querysets, self.counts):
+            if stop is not None and stop <= 0:
+                break
+            if start < count:
+                end = count if stop is None else min(stop, count)
+                items.extend(queryset[start:end])
+            start = max(start - count, 0)
+            if stop is not None:
+                stop -= count
+        return items
@@ -0,0 +1,123 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import time
+from datetime import datetime
+
+from django.conf import settings
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+DETERMINISTIC = 'cprofile'
+SAMPLING = 'sampling'
+PROFILE_NAME_RE = re.compile(r'^[\w.-]+\.(prof|html)$')
+STATS_LINES: int = 60
+STATS_SORTS = ('cumulative', 'tottime', 'calls')
+
+
+def requested_mode(request):
+    """Режим профилирования, запрошенный сотрудником, или None.
+
+    Профиль снимается по параметру ?<PROFILING_QUERY_PARAM>= или
+    заголовку X-Profile; значение sampling выбирает pyinstrument,
+    если он установлен, любое другое — cProfile.
+    """
+    if not settings.PROFILING_ENABLED:
+        return None
+    value = request.GET.get(
+        settings.PROFILING_QUERY_PARAM,
+        request.META.get('HTTP_X_PROFILE'),
+    )
+    if value is None or not request.user.is_staff:
+        return None
+    if value == SAMPLING and pyinstrument is not None:
+        return SAMPLING
+    return DETERMINISTIC
+
+
+class Capture:
+    """Профиль одного запроса: start(), stop(), save()."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        if mode == SAMPLING:
+            self.profiler = pyinstrument.Profiler()
+        else:
+            self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.started = time.perf_counter()
+        if self.mode == SAMPLING:
+            self.profiler.start()
+        else:
+            self.profiler.enable()
+
+    def stop(self):
+        if self.mode == SAMPLING:
+            self.profiler.stop()
+        else:
+            self.profiler.disable()
+        self.duration = time.perf_counter() - self.started
+
+    def save(self, label):
+        """Пишет профиль в PROFILING_DIR, возвращает имя файла."""
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        label = re.sub(r'[^\w-]+', '_', label).strip('_')[:60] or 'request'
+        extension = 'html' if self.mode == SAMPLING else 'prof'
+        name = f'{stamp}-{label}-{self.duration * 1000:.0f}ms.{extension}'
+        path = os.path.join(settings.PROFILING_DIR, name)
+        if self.mode == SAMPLING:
+            with open(path, 'w') as file:
+                file.write(self.profiler.output_html())
+        else:
+            self.profiler.dump_stats(path)
+        prune()
+        return name
+
+
+def list_profiles():
+    """Сохранённые профили, новые первыми: (имя, размер, время)."""
+    if not os.path.isdir(settings.PROFILING_DIR):
+        return []
+    profiles = []
+    for entry in os.scandir(settings.PROFILING_DIR):
+        if entry.is_file() and PROFILE_NAME_RE.match(entry.name):
+            stat = entry.stat()
+            profiles.append((
+                entry.name,
+                stat.st_size,
+                datetime.fromtimestamp(stat.st_mtime),
+            ))
+    # имя начинается с времени снятия с микросекундами
+    return sorted(profiles, reverse=True)
+
+
+def prune():
+    """Удаляет профили старше PROFILING_MAX_AGE секунд и все сверх
+    PROFILING_MAX_FILES самых новых."""
+    cutoff = datetime.fromtimestamp(time.time() - settings.PROFILING_MAX_AGE)
+    for index, (name, _, modified) in enumerate(list_profiles()):
+        if index >= settings.PROFILING_MAX_FILES or modified < cutoff:
+            os.remove(os.path.join(settings.PROFILING_DIR, name))
+
+
+def profile_path(name):
+    """Путь к профилю по имени файла или None для чужих имён."""
+    if not PROFILE_NAME_RE.match(name):
+        return None
+    path = os.path.join(settings.PROFILING_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+def stats_text(path, sort='cumulative'):
+    """Первые STATS_LINES строк отчёта pstats."""
+    output = io.StringIO()
+    stats = pstats.Stats(path, stream=output)
+    stats.strip_dirs().sort_stats(sort).print_stats(STATS_LINES)
+    return output.getvalue()
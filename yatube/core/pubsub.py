@@ -0,0 +1,86 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+# сколько секунд событие хранится в кэше для отставших подписчиков
+EVENT_TTL: int = 5 * 60
+# больше стольких пропущенных событий подписчику не досылается:
+# last_id приходит от клиента и не должен задавать длину цикла
+BACKLOG: int = 100
+
+_condition = threading.Condition()
+
+
+def _cache():
+    return caches[settings.PUBSUB_CACHE_ALIAS]
+
+
+def _seq_key(channel):
+    return f'pubsub.{channel}.seq'
+
+
+def _event_key(channel, seq):
+    return f'pubsub.{channel}.{seq}'
+
+
+def last_event_id(channel):
+    """Номер последнего события канала."""
+    return _cache().get(_seq_key(channel), 0)
+
+
+def publish(channel, data):
+    """Публикует событие data в канал.
+
+    Событие получает номер из счётчика в общем кэше и хранится там
+    EVENT_TTL секунд, так что его видят подписчики из всех процессов.
+    Подписчики этого процесса будятся сразу, остальные — при следующем
+    опросе кэша.
+    """
+    cache = _cache()
+    cache.add(_seq_key(channel), 0, None)
+    try:
+        seq = cache.incr(_seq_key(channel))
+    except ValueError:
+        cache.set(_seq_key(channel), 1, None)
+        seq = 1
+    cache.set(_event_key(channel, seq), data, EVENT_TTL)
+    with _condition:
+        _condition.notify_all()
+    return seq
+
+
+def listen(channel, last_id=None, timeout=None):
+    """События канала после last_id: пары (номер, данные).
+
+    Отставшему подписчику досылаются только последние BACKLOG событий.
+
+    Пока событий нет, раз в settings.PUBSUB_POLL_INTERVAL секунд
+    отдаётся (None, None), чтобы вызывающий мог отправить keep-alive.
+    Через timeout секунд (по умолчанию settings.SSE_STREAM_TIMEOUT)
+    генератор завершается.
+    """
+    timeout = settings.SSE_STREAM_TIMEOUT if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    current = last_event_id(channel)
+    last = current if last_id is None else min(last_id, current)
+    last = max(last, current - BACKLOG)
+    while True:
+        for seq in range(last + 1, current + 1):
+            data = _cache().get(_event_key(channel, seq))
+            if data is not None:
+                yield seq, data
+        last = current
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        with _condition:
+            _condition.wait(min(settings.PUBSUB_POLL_INTERVAL, remaining))
+        current = last_event_id(channel)
+        if current == last:
+            yield None, None
+        elif current < last:
+            # счётчик пропал из кэша и начался заново
+            last = 0
@@ -0,0 +1,111 @@
+import math
+import time
+from functools import wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import caches
+from django.shortcuts import render
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60): столько запросов за столько секунд."""
+    limit, period = rate.split('/')
+    return int(limit), PERIODS[period]
+
+
+def client_key(request):
+    """Вошедший пользователь ограничивается по id, гость — по IP.
+
+    Берётся REMOTE_ADDR: X-Forwarded-For подделывается клиентом, за прокси
+    адрес клиента должен подставлять сам прокси.
+    """
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def hit(scope, key, limit, period, now=None):
+    """Учитывает запрос scope/key в скользящем окне period секунд.
+
+    Запросы считаются атомарным incr в общем кэше по окнам длиной
+    period, так что счёт делят все процессы сайта. Число запросов
+    за последние period секунд оценивается как счётчик текущего окна
+    плюс счётчик предыдущего, взвешенный долей, которая ещё попадает
+    в скользящее окно. В отличие от фиксированного окна, серия
+    запросов на стыке двух окон не пропускает вдвое больше limit.
+    Отклонённый запрос не учитывается.
+
+    Возвращает None, если запрос укладывается в limit, иначе — через
+    сколько секунд он уложится, если клиент не будет слать новых.
+    """
+    now = time.time() if now is None else now
+    window = int(now // period)
+    elapsed = now - window * period
+    cache = caches[settings.RATELIMIT_CACHE_ALIAS]
+    current_key = f'ratelimit.{scope}.{key}.{window}'
+    # счётчик нужен ещё одно окно — как предыдущий для следующего
+    cache.add(current_key, 0, 2 * period + 1)
+    try:
+        used = cache.incr(current_key)
+    except ValueError:
+        # ключ вытеснен из кэша между add и incr
+        cache.set(current_key, 1, 2 * period + 1)
+        used = 1
+    previous = cache.get(f'ratelimit.{scope}.{key}.{window - 1}', 0)
+    if previous * (1 - elapsed / period) + used <= limit:
+        return None
+    try:
+        cache.decr(current_key)
+    except ValueError:
+        pass
+    return seconds_until_allowed(used - 1, previous, limit, period, elapsed)
+
+
+def seconds_until_allowed(used, previous, limit, period, elapsed):
+    """Через сколько секунд оценка скользящего окна с used запросами
+    в текущем окне и previous в предыдущем опустится до limit - 1."""
+    if used < limit:
+        # хватит того, что вес предыдущего окна уменьшится
+        wait = (1 - (limit - 1 - used) / previous) * period - elapsed
+    else:
+        # текущее окно станет предыдущим и должно «остыть»
+        wait = period - elapsed + (1 - (limit - 1) / used) * period
+    return max(1, math.ceil(wait))
+
+
+def ratelimit(rate, scope=None, methods=None):
+    """Ограничивает частоту запросов к view: не больше rate ('10/m').
+
+    methods — какие HTTP-методы учитывать, по умолчанию все.
+    Превысившему лимит отдаётся 429 с заголовком Retry-After.
+    """
+    limit, period = parse_rate(rate)
+
+    def decorator(view_func):
+        bucket = scope or view_func.__name__
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATELIMIT_ENABLED and (
+                methods is None or request.method in methods
+            ):
+                retry_after = hit(bucket, client_key(request), limit, period)
+                if retry_after is not None:
+                    return too_many_requests(request, retry_after)
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def too_many_requests(request, retry_after):
+    response = render(
+        request,
+        'core/429.html',
+        {'retry_after': retry_after},
+        status=HTTPStatus.TOO_MANY_REQUESTS,
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
@@ -0,0 +1,209 @@
+import hashlib
+import os
+import re
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SlowQuery
+
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+    'mysql': 'EXPLAIN ',
+}
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'\bIN \((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+SPACE_RE = re.compile(r'\s+')
+_lock = threading.Lock()
+_pending = {}
+_state = {'last_flush': time.monotonic()}
+# кадры стека из этих файлов не считаются местом вызова
+SKIPPED_ORIGINS = (
+    os.path.join('core', 'slowlog.py'),
+    os.path.join('core', 'middleware.py'),
+)
+
+
+def normalize(sql):
+    """SQL без конкретных значений: литералы и списки IN заменены на ?."""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()
+
+
+def find_origin():
+    """Ближайший к запросу кадр стека из кода проекта: файл:строка функция."""
+    base_dir = settings.BASE_DIR + os.sep
+    for frame in reversed(traceback.extract_stack()):
+        if (
+            frame.filename.startswith(base_dir)
+            and 'site-packages' not in frame.filename
+            and not frame.filename.endswith(SKIPPED_ORIGINS)
+        ):
+            filename = os.path.relpath(frame.filename, settings.BASE_DIR)
+            return f'{filename}:{frame.lineno} {frame.name}'
+    return ''
+
+
+class QueryLog:
+    """execute_wrapper, который запоминает запросы дольше
+    SLOW_QUERY_THRESHOLD секунд; finish() передаёт их в журнал процесса.
+
+    В момент выполнения запроса в базу ничего не пишется:
+    это сделал бы тот же обёрнутый курсор.
+    """
+
+    def __init__(self, request=None):
+        self.request = request
+        self.queries = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration >= settings.SLOW_QUERY_THRESHOLD:
+                self.record(sql, params, many, context, duration)
+
+    def record(self, sql, params, many, context, duration):
+        normalized = normalize(sql)
+        key = fingerprint(normalized)
+        entry = self.queries.setdefault(key, {
+            'normalized_sql': normalized,
+            'calls': 0,
+            'total_time': 0,
+            'max_time': 0,
+        })
+        entry['calls'] += 1
+        entry['total_time'] += duration
+        if duration >= entry['max_time']:
+            match = getattr(self.request, 'resolver_match', None)
+            entry.update(
+                max_time=duration,
+                sql=sql,
+                params=None if many else params,
+                using=context['connection'].alias,
+                view_name=match.view_name if match else '',
+                origin=find_origin(),
+            )
+
+    def finish(self):
+        """Добавляет накопленное к журналу процесса; в базу его пишет
+        flush_slow_queries. Возвращает число отпечатков."""
+        with _lock:
+            for key, entry in self.queries.items():
+                pending = _pending.get(key)
+                if pending is None:
+                    _pending[key] = entry
+                    continue
+                pending['calls'] += entry['calls']
+                pending['total_time'] += entry['total_time']
+                if entry['max_time'] > pending['max_time']:
+                    pending.update(
+                        (name, value) for name, value in entry.items()
+                        if name not in ('calls', 'total_time')
+                    )
+        count = len(self.queries)
+        self.queries = {}
+        return count
+
+
+def flush_slow_queries():
+    """Пишет журнал процесса в SlowQuery; возвращает число отпечатков.
+
+    EXPLAIN выполняется только для запросов медленнее уже сохранённого
+    самого медленного выполнения с тем же отпечатком.
+    """
+    with _lock:
+        queries = dict(_pending)
+        _pending.clear()
+        _state['last_flush'] = time.monotonic()
+    if not queries:
+        return 0
+    slowest = dict(
+        SlowQuery.objects.filter(fingerprint__in=queries).values_list(
+            'fingerprint', 'max_time'
+        )
+    )
+    now = timezone.now()
+    for key, entry in queries.items():
+        slower = key not in slowest or entry['max_time'] > slowest[key]
+        entry['plan'] = explain(entry) if slower else ''
+        save_entry(key, entry, now, slower)
+    return len(queries)
+
+
+def flush_slow_queries_periodically(**kwargs):
+    """Обработчик request_finished: пишет журнал по интервалу, уже после
+    отправки ответа."""
+    interval = settings.SLOW_QUERY_FLUSH_INTERVAL
+    if time.monotonic() - _state['last_flush'] >= interval:
+        flush_slow_queries()
+
+
+def explain(entry):
+    """План самого медленного выполнения; только для SELECT."""
+    connection = connections[entry['using']]
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+    sql = entry['sql']
+    if prefix is None or entry['params'] is None:
+        return ''
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return ''
+    try:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + sql, entry['params'])
+                rows = cursor.fetchall()
+    except DatabaseError:
+        return ''
+    return '\n'.join(
+        ' '.join(str(value) for value in row) for row in rows
+    )
+
+
+def save_entry(key, entry, now, slower=True):
+    slowest = {
+        'sql': entry['sql'],
+        'plan': entry['plan'],
+        'view_name': entry['view_name'][:200],
+        'origin': entry['origin'][:300],
+        'max_time': entry['max_time'],
+    }
+    queries = SlowQuery.objects.filter(fingerprint=key)
+    updated = queries.update(
+        calls=F('calls') + entry['calls'],
+        total_time=F('total_time') + entry['total_time'],
+        last_seen=now,
+    )
+    if updated:
+        if slower:
+            queries.filter(max_time__lt=entry['max_time']).update(**slowest)
+        return
+    try:
+        with transaction.atomic():
+            SlowQuery.objects.create(
+                fingerprint=key,
+                normalized_sql=entry['normalized_sql'],
+                calls=entry['calls'],
+                total_time=entry['total_time'],
+                last_seen=now,
+                **slowest,
+            )
+    except IntegrityError:
+        # запись создал параллельный запрос
+        save_entry(key, entry, now, slower)
@@ -0,0 +1,66 @@
+import gzip
+import io
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.json', '.svg', '.txt', '.html', '.xml', '.ico',
+)
+COMPRESS_MIN_SIZE: int = 256
+
+
+def gzip_bytes(data):
+    """Сжимает данные gzip с нулевым mtime, чтобы результат был стабильным."""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(
+        fileobj=buffer, mode='wb', compresslevel=9, mtime=0
+    ) as compressed:
+        compressed.write(data)
+    return buffer.getvalue()
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хранилище статики с хэшами в именах и сжатыми копиями файлов.
+
+    Во время collectstatic рядом с каждым текстовым файлом кладутся
+    `.gz` и (если установлен brotli) `.br` версии, которые отдаёт
+    core.middleware.StaticFilesMiddleware.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        names = set(self.hashed_files.values()) | set(paths)
+        for name in sorted(names):
+            for compressed_name in self.compress(name):
+                yield name, compressed_name, True
+
+    def compress(self, name):
+        """Сохраняет сжатые версии файла и возвращает их имена."""
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS) or not self.exists(name):
+            return []
+
+        with self.open(name) as original:
+            data = original.read()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return []
+
+        variants = [('.gz', gzip_bytes(data))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data)))
+
+        saved = []
+        for suffix, content in variants:
+            if len(content) >= len(data):
+                continue
+            with open(self.path(name) + suffix, 'wb') as compressed:
+                compressed.write(content)
+            saved.append(name + suffix)
+        return saved
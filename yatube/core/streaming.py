@@ -0,0 +1,94 @@
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.template import loader
+from django.template.base import TextNode
+from django.template.context import make_context
+from django.template.loader_tags import (BLOCK_CONTEXT_KEY, BlockContext,
+                                         BlockNode, ExtendsNode)
+
+
+def stream_render(request, template_name, context=None, status=None):
+    """Аналог django.shortcuts.render, отдающий страницу по частям.
+
+    Узлы верхнего уровня базового шаблона рендерятся и отправляются
+    по одному: <head> и шапка уходят клиенту до того, как блок content
+    начнёт выполнять запросы к базе.
+    """
+    backend_template = loader.get_template(template_name)
+    return StreamingHttpResponse(
+        iter_template(backend_template, context, request),
+        status=status,
+    )
+
+
+def event_stream(events):
+    """Ответ text/event-stream (Server-Sent Events) из пар (id, данные).
+
+    Пара (None, None) отправляется как комментарий keep-alive, чтобы
+    прокси не закрыли соединение по таймауту. Браузер переподключается
+    сам через settings.SSE_RETRY мс и присылает Last-Event-ID.
+    """
+    response = StreamingHttpResponse(
+        _iter_events(events), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # nginx не должен буферизовать поток событий
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _iter_events(events):
+    yield f'retry: {settings.SSE_RETRY}\n\n'
+    for event_id, data in events:
+        if event_id is None:
+            yield ': keep-alive\n\n'
+        else:
+            payload = json.dumps(data, ensure_ascii=False)
+            yield f'id: {event_id}\ndata: {payload}\n\n'
+
+
+def iter_template(backend_template, context=None, request=None):
+    template = backend_template.template
+    context = make_context(
+        context, request, autoescape=backend_template.backend.engine.autoescape
+    )
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            context.template_name = template.name
+            for chunk in _iter_nodes(template, context):
+                if chunk:
+                    yield chunk
+
+
+def _iter_nodes(template, context):
+    """Повторяет ExtendsNode.render, но отдаёт вывод корневого шаблона
+    по узлам вместо одной строки."""
+    extends = _extends_node(template)
+    if extends is None:
+        for node in template.nodelist:
+            yield node.render_annotated(context)
+        return
+
+    parent = extends.get_parent(context)
+    if BLOCK_CONTEXT_KEY not in context.render_context:
+        context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(extends.blocks)
+    if _extends_node(parent) is None:
+        block_context.add_blocks({
+            node.name: node
+            for node in parent.nodelist.get_nodes_by_type(BlockNode)
+        })
+
+    with context.render_context.push_state(parent, isolated_context=False):
+        yield from _iter_nodes(parent, context)
+
+
+def _extends_node(template):
+    for node in template.nodelist:
+        # {% extends %} должен быть первым нетекстовым узлом шаблона.
+        if not isinstance(node, TextNode):
+            return node if isinstance(node, ExtendsNode) else None
+    return None
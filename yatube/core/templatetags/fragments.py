@@ -0,0 +1,53 @@
+from django import template
+from django.conf import settings
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.http import urlencode
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+FRAGMENTS_LOADER = mark_safe(
+    '<script>'
+    'document.querySelectorAll("[data-fragment-src]").forEach(function (el) {'
+    'fetch(el.dataset.fragmentSrc, {credentials: "same-origin"})'
+    '.then(function (response) { return response.text(); })'
+    '.then(function (html) { el.outerHTML = html; });'
+    '});'
+    '</script>'
+)
+
+
+@register.simple_tag(takes_context=True)
+def fragment(context, template_name, url_name, *args, **params):
+    """Персональная часть страницы.
+
+    В режиме settings.FRAGMENTS_MODE = 'inline' шаблон рендерится сразу.
+    В режимах 'esi' и 'ajax' на его месте остаётся ссылка на url_name
+    (тег <esi:include> для прокси или заглушка для fragments_loader),
+    и сама страница становится одинаковой для всех пользователей.
+    params передаются фрагменту GET-параметрами, а параметр view
+    доступен шаблону фрагмента как fragment_view_name.
+    """
+    if settings.FRAGMENTS_MODE == 'inline':
+        fragment_template = context.template.engine.get_template(
+            template_name
+        )
+        with context.push(fragment_view_name=params.get('view', '')):
+            return mark_safe(fragment_template.render(context))
+
+    url = reverse(url_name, args=args)
+    params = {key: value for key, value in params.items() if value}
+    if params:
+        url = f'{url}?{urlencode(params)}'
+    if settings.FRAGMENTS_MODE == 'esi':
+        return format_html('<esi:include src="{}" />', url)
+    return format_html('<span data-fragment-src="{}"></span>', url)
+
+
+@register.simple_tag
+def fragments_loader():
+    """Скрипт, подгружающий фрагменты в режиме 'ajax'."""
+    if settings.FRAGMENTS_MODE == 'ajax':
+        return FRAGMENTS_LOADER
+    return ''
@@ -1,7 +1,39 @@
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
 from http import HTTPStatus
+from unittest import mock, skipIf
 
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
 from django.core.cache import cache
-from django.test import TestCase
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.db import DatabaseError, connection, connections, transaction
+from django.http import HttpResponse
+from django.test import (
+    Client, RequestFactory, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+from . import paginator
+from . import pubsub
+from .models import SlowQuery
+from .ratelimit import hit, ratelimit
+from .slowlog import QueryLog, flush_slow_queries, normalize
+from .storage import COMPRESS_MIN_SIZE, CompressedManifestStaticFilesStorage
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEST_CSS = b'body { color: black; }\n' * COMPRESS_MIN_SIZE
+CONCURRENT_WRITERS: int = 8
+COMMENTS_PER_WRITER: int = 50
 
 
 class ViewTestClass(TestCase):
@@ -13,3 +45,484 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+@override_settings(COMPRESSION_MIN_SIZE=0)
+class CompressionMiddlewareTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_response_is_gzipped(self):
+        """HTML сжимается для клиентов с поддержкой gzip."""
+        response = self.client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn(b'<html', gzip.decompress(response.content))
+
+    def test_response_without_accept_encoding(self):
+        """Без Accept-Encoding или с gzip;q=0 ответ не сжимается."""
+        for accepted in ('', 'gzip;q=0', 'deflate, gzip ;q=0.000'):
+            with self.subTest(accepted=accepted):
+                cache.clear()
+                response = self.client.get(
+                    '/', HTTP_ACCEPT_ENCODING=accepted
+                )
+
+                self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_accepted_with_nonzero_quality(self):
+        """gzip с ненулевым q принимается."""
+        response = self.client.get(
+            '/', HTTP_ACCEPT_ENCODING='gzip;q=0.5, identity;q=0.1'
+        )
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    @override_settings(COMPRESSION_MIN_SIZE=10 ** 9)
+    def test_small_response_is_not_compressed(self):
+        """Ответы меньше COMPRESSION_MIN_SIZE не сжимаются."""
+        response = self.client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+@override_settings(STATIC_ROOT=TEMP_STATIC_ROOT)
+class StaticFilesTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        source_dir = tempfile.mkdtemp(dir=TEMP_STATIC_ROOT)
+        os.makedirs(os.path.join(source_dir, 'css'))
+        with open(os.path.join(source_dir, 'css', 'app.css'), 'wb') as f:
+            f.write(TEST_CSS)
+
+        storage = CompressedManifestStaticFilesStorage(
+            location=TEMP_STATIC_ROOT
+        )
+        source = FileSystemStorage(location=source_dir)
+        cls.processed = list(
+            storage.post_process({'css/app.css': (source, 'css/app.css')})
+        )
+        cls.hashed_name = storage.stored_name('css/app.css')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def test_collectstatic_writes_gzip_copy(self):
+        """collectstatic сохраняет сжатую копию файла с хэшем в имени."""
+        self.assertNotEqual(self.hashed_name, 'css/app.css')
+        self.assertIn(
+            ('css/app.css', self.hashed_name, True),
+            self.processed,
+        )
+
+        path = os.path.join(TEMP_STATIC_ROOT, self.hashed_name + '.gz')
+        with open(path, 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), TEST_CSS)
+
+    def test_middleware_serves_precompressed_file(self):
+        """Middleware отдаёт .gz версию и годовой срок кэширования."""
+        response = self.client.get(
+            settings.STATIC_URL + self.hashed_name,
+            HTTP_ACCEPT_ENCODING='gzip, deflate',
+        )
+        content = b''.join(response.streaming_content)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn(
+            f'max-age={settings.STATIC_MAX_AGE}', response['Cache-Control']
+        )
+        self.assertEqual(gzip.decompress(content), TEST_CSS)
+
+    def test_middleware_serves_plain_file(self):
+        """Без Accept-Encoding или с gzip;q=0 файл отдаётся несжатым."""
+        for accepted in ('', 'gzip;q=0, deflate', 'GZIP; q=0.0'):
+            with self.subTest(accepted=accepted):
+                response = self.client.get(
+                    settings.STATIC_URL + self.hashed_name,
+                    HTTP_ACCEPT_ENCODING=accepted,
+                )
+
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(
+                    b''.join(response.streaming_content), TEST_CSS
+                )
+
+    def test_middleware_ignores_missing_and_unsafe_paths(self):
+        """Отсутствующие файлы и выход за STATIC_ROOT не раздаются."""
+        for path in ('css/missing.css', '../settings.py'):
+            with self.subTest(path=path):
+                response = self.client.get(settings.STATIC_URL + path)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class DatabaseConnectionTests(TransactionTestCase):
+    # бенчмарк закрывает соединение, внутри транзакции TestCase нельзя
+
+    def test_sqlite_pragmas_applied_on_connect(self):
+        """Соединение с SQLite настроено PRAGMA из settings."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            synchronous = cursor.fetchone()[0]
+
+        # 1 == NORMAL
+        self.assertEqual(synchronous, 1)
+
+    def test_bench_db_connections(self):
+        """Бенчмарк соединений печатает стоимость на запрос."""
+        out = io.StringIO()
+        call_command('bench_db_connections', requests=5, stdout=out)
+
+        self.assertIn('открытие соединения', out.getvalue())
+
+
+@skipIf(
+    connection.vendor != 'sqlite' or connection.is_in_memory_db(),
+    'нужна файловая база SQLite',
+)
+@override_settings(RATELIMIT_ENABLED=False, COMMENTS_WRITE_BEHIND=False)
+class SQLiteTuningTests(TransactionTestCase):
+
+    def setUp(self) -> None:
+        self.author = get_user_model().objects.create_user(username='auth')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.writers = [
+            get_user_model().objects.create_user(username=f'writer{writer_id}')
+            for writer_id in range(CONCURRENT_WRITERS)
+        ]
+
+    def test_connection_uses_wal(self):
+        """Соединение Django с файловой базой работает в режиме WAL."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+            cursor.execute('PRAGMA busy_timeout')
+            busy_timeout = cursor.fetchone()[0]
+
+        self.assertEqual(journal_mode, 'wal')
+        self.assertEqual(busy_timeout, settings.SQLITE_PRAGMAS['busy_timeout'])
+
+    def test_concurrent_comment_writers(self):
+        """Параллельные комментарии не получают database is locked."""
+        url = reverse('posts:add_comment', args=(self.post.pk,))
+        errors = []
+
+        def write(user):
+            client = Client()
+            client.force_login(user)
+            try:
+                for i in range(COMMENTS_PER_WRITER):
+                    response = client.post(url, {'text': f'Комментарий {i}'})
+                    if response.status_code != HTTPStatus.FOUND:
+                        errors.append(response.status_code)
+            except DatabaseError as error:
+                errors.append(error)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=write, args=(user,))
+            for user in self.writers
+        ]
+        # открытая читающая транзакция не должна мешать писателям
+        with transaction.atomic():
+            before = Comment.objects.count()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(before, 0)
+        self.assertEqual(
+            Comment.objects.count(), CONCURRENT_WRITERS * COMMENTS_PER_WRITER
+        )
+
+
+class ApproximateCountPaginatorTests(TestCase):
+
+    def setUp(self) -> None:
+        get_user_model().objects.create_user(username='auth')
+
+    def test_estimate_used_for_unfiltered_big_table(self):
+        """Для большой таблицы без фильтров COUNT(*) не выполняется."""
+        queryset = get_user_model().objects.all()
+        estimate = paginator.APPROXIMATE_COUNT_THRESHOLD + 1
+        with mock.patch.object(
+            paginator, 'estimate_table_rows', return_value=estimate
+        ):
+            with self.assertNumQueries(0):
+                count = paginator.ApproximateCountPaginator(
+                    queryset, 10
+                ).count
+
+        self.assertEqual(count, estimate)
+
+    def test_exact_count_for_filtered_queryset(self):
+        """С фильтром число строк считается точно."""
+        queryset = get_user_model().objects.filter(username='auth')
+        with mock.patch.object(
+            paginator, 'estimate_table_rows', return_value=10 ** 9
+        ):
+            count = paginator.ApproximateCountPaginator(queryset, 10).count
+
+        self.assertEqual(count, 1)
+
+
+class RateLimitTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.factory = RequestFactory()
+        self.view = ratelimit('2/m', methods=('POST',))(
+            lambda request: HttpResponse('ok')
+        )
+
+    def request(self, method='post', address='10.0.0.1'):
+        request = getattr(self.factory, method)('/', REMOTE_ADDR=address)
+        request.user = AnonymousUser()
+        return self.view(request)
+
+    def test_limit_exceeded(self):
+        """Сверх лимита отдаётся 429 с Retry-After."""
+        statuses = [self.request().status_code for _ in range(3)]
+        response = self.request()
+
+        self.assertEqual(statuses[:2], [HTTPStatus.OK, HTTPStatus.OK])
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        # серия в начале окна: ждать, пока окно не станет предыдущим
+        # и вес его счётчика не уменьшится вдвое
+        self.assertLessEqual(int(response['Retry-After']), 2 * 60)
+
+    def test_clients_and_methods_counted_separately(self):
+        """Корзины разных клиентов независимы, GET не учитывается."""
+        for _ in range(3):
+            self.request()
+
+        self.assertEqual(
+            self.request(address='10.0.0.2').status_code, HTTPStatus.OK
+        )
+        self.assertEqual(self.request('get').status_code, HTTPStatus.OK)
+
+    def test_window_slides(self):
+        """Старые запросы перестают учитываться по мере сдвига окна."""
+        now = 60 * 1000
+
+        self.assertIsNone(hit('test', 'key', 2, 60, now=now))
+        self.assertIsNone(hit('test', 'key', 2, 60, now=now + 10))
+        self.assertEqual(hit('test', 'key', 2, 60, now=now + 15), 75)
+        self.assertIsNotNone(hit('test', 'key', 2, 60, now=now + 60 + 20))
+        self.assertIsNone(hit('test', 'key', 2, 60, now=now + 60 + 30))
+
+    def test_no_double_burst_on_window_boundary(self):
+        """Серия на стыке окон не получает вдвое больше лимита."""
+        end_of_window = 60 * 1000 + 59
+        allowed = [
+            hit('test', 'key', 5, 60, now=end_of_window) is None
+            for _ in range(5)
+        ] + [
+            hit('test', 'key', 5, 60, now=end_of_window + 2) is None
+            for _ in range(5)
+        ]
+
+        self.assertEqual(allowed.count(True), 5)
+
+    @override_settings(RATELIMIT_ENABLED=False)
+    def test_disabled(self):
+        """RATELIMIT_ENABLED=False отключает ограничение."""
+        statuses = {self.request().status_code for _ in range(5)}
+
+        self.assertEqual(statuses, {HTTPStatus.OK})
+
+    def test_bench_ratelimit(self):
+        """Бенчмарк печатает стоимость проверки на запрос."""
+        out = io.StringIO()
+        call_command('bench_ratelimit', requests=100, stdout=out)
+
+        self.assertIn('мс/запрос', out.getvalue())
+
+
+class PubSubTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_listen_returns_events_after_last_id(self):
+        """Подписчик получает события после last_id по порядку."""
+        for i in range(3):
+            pubsub.publish('test', {'n': i})
+
+        events = list(pubsub.listen('test', last_id=1, timeout=0))
+
+        self.assertEqual(events, [(2, {'n': 1}), (3, {'n': 2})])
+
+    def test_listen_clamps_client_last_id(self):
+        """Подписчику с очень старым last_id досылается не больше
+        BACKLOG событий."""
+        for i in range(pubsub.BACKLOG + 5):
+            pubsub.publish('test', {'n': i})
+
+        events = list(pubsub.listen('test', last_id=0, timeout=0))
+
+        self.assertEqual(len(events), pubsub.BACKLOG)
+        self.assertEqual(events[0][0], 6)
+
+    @override_settings(PUBSUB_POLL_INTERVAL=10)
+    def test_publish_wakes_listener(self):
+        """Публикация в этом процессе будит подписчика без ожидания опроса."""
+        timer = threading.Timer(
+            0.1, pubsub.publish, args=('test', {'n': 1})
+        )
+        timer.start()
+        started = time.monotonic()
+        events = pubsub.listen('test', timeout=5)
+
+        self.assertEqual(next(events), (1, {'n': 1}))
+        self.assertLess(time.monotonic() - started, 5)
+        timer.join()
+
+
+class ProfilingTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        profiles_dir = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, profiles_dir, ignore_errors=True)
+        settings_override = override_settings(
+            PROFILING_DIR=profiles_dir, PROFILING_MAX_FILES=2,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.staff = get_user_model().objects.create_user(
+            username='staff', is_staff=True,
+        )
+
+    def test_staff_request_profiled(self):
+        """Профиль снимается только для сотрудника и только по запросу."""
+        self.assertFalse(self.client.get('/', {'_profile': '1'}).has_header(
+            'X-Profile-Id'
+        ))
+        self.client.force_login(self.staff)
+        self.assertFalse(self.client.get('/').has_header('X-Profile-Id'))
+
+        response = self.client.get('/', HTTP_X_PROFILE='1')
+
+        name = response['X-Profile-Id']
+        self.assertIn('posts_index', name)
+        self.assertContains(
+            self.client.get(f'/admin/profiles/{name}'), 'function calls'
+        )
+        self.assertContains(self.client.get('/admin/profiles/'), name)
+
+    def test_retention(self):
+        """Хранятся только PROFILING_MAX_FILES последних профилей."""
+        self.client.force_login(self.staff)
+        names = [
+            self.client.get('/', {'_profile': '1'})['X-Profile-Id']
+            for _ in range(3)
+        ]
+
+        self.assertCountEqual(
+            os.listdir(settings.PROFILING_DIR), names[1:]
+        )
+
+    def test_profile_pages_staff_only(self):
+        """Список профилей закрыт от обычных пользователей."""
+        user = get_user_model().objects.create_user(username='user')
+        self.client.force_login(user)
+
+        response = self.client.get('/admin/profiles/')
+
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.client.force_login(self.staff)
+        self.assertEqual(
+            self.client.get('/admin/profiles/missing.prof').status_code,
+            HTTPStatus.NOT_FOUND,
+        )
+
+
+@override_settings(SLOW_QUERY_THRESHOLD=0, SLOW_QUERY_FLUSH_INTERVAL=0)
+class SlowQueryLogTests(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_normalize(self):
+        """Запросы, отличающиеся значениями, дают одинаковый текст."""
+        self.assertEqual(
+            normalize(
+                'SELECT "t"."id" FROM "t" WHERE "t"."id" IN (%s, %s, %s)\n'
+                "  AND \"t\".\"name\" = 'x''y' LIMIT 21"
+            ),
+            'SELECT "t"."id" FROM "t" WHERE "t"."id" IN (...) '
+            'AND "t"."name" = ? LIMIT ?',
+        )
+
+    def test_queries_aggregated_with_plan(self):
+        """Запросы страницы пишутся с представлением, местом и планом."""
+        for _ in range(2):
+            cache.clear()
+            self.client.get('/')
+
+        queries = SlowQuery.objects.filter(view_name='posts:index')
+        self.assertTrue(queries.exists())
+        self.assertEqual({query.calls for query in queries}, {2})
+        for query in queries:
+            with self.subTest(sql=query.normalized_sql):
+                self.assertTrue(query.plan)
+                self.assertRegex(query.origin, r'\.py:\d+ \w+$')
+
+    def test_explain_only_for_slower_runs(self):
+        """План снимается, только если запрос медленнее сохранённого."""
+        sql = 'SELECT COUNT(*) FROM "auth_user" WHERE "id" > %s'
+        context = {'connection': connection}
+        with mock.patch('core.slowlog.explain', return_value='PLAN') as plan:
+            for duration in (0.5, 0.2, 0.8):
+                log = QueryLog()
+                log.record(sql, (0,), False, context, duration)
+                log.finish()
+                flush_slow_queries()
+
+        query = SlowQuery.objects.get()
+        self.assertEqual(plan.call_count, 2)
+        self.assertEqual(query.calls, 3)
+        self.assertEqual(query.max_time, 0.8)
+
+    def test_written_after_response(self):
+        """В базу журнал пишется по интервалу, после ответа."""
+        with override_settings(SLOW_QUERY_FLUSH_INTERVAL=60 * 60):
+            self.client.get('/')
+            self.assertFalse(SlowQuery.objects.exists())
+
+        flush_slow_queries()
+
+        self.assertTrue(SlowQuery.objects.exists())
+
+    @override_settings(SLOW_QUERY_THRESHOLD=None)
+    def test_disabled(self):
+        """Без порога журнал не ведётся."""
+        self.client.get('/')
+
+        self.assertFalse(SlowQuery.objects.exists())
+
+    def test_report_command(self):
+        """Отчёт показывает самые медленные запросы."""
+        self.client.get('/')
+        out = io.StringIO()
+
+        call_command('slow_queries', top=3, plans=True, stdout=out)
+
+        self.assertIn('posts:index', out.getvalue())
@@ -1,6 +1,16 @@
 from http import HTTPStatus
 
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import render
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from . import profiling
+
+FRAGMENT_TEMPLATES = {
+    'header': 'includes/header_user.html',
+    'switcher': 'includes/switcher.html',
+}
 
 
 def page_not_found(request, exception):
@@ -33,3 +43,55 @@ def csrf_failure(request, reason=''):
         request,
         'core/403csrf.html'
     )
+
+
+def private_fragment(response):
+    """Помечает персональный фрагмент как некэшируемый общими кэшами."""
+    patch_cache_control(response, private=True, max_age=0)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def fragment(request, name):
+    """Персональный фрагмент страницы для core.templatetags.fragments."""
+    if name not in FRAGMENT_TEMPLATES:
+        raise Http404
+    context = {
+        'fragment_view_name': request.GET.get('view', ''),
+    }
+    return private_fragment(
+        render(request, FRAGMENT_TEMPLATES[name], context)
+    )
+
+
+@staff_member_required
+def profile_list(request):
+    """Список профилей, снятых ProfilingMiddleware."""
+    context = {
+        'profiles': profiling.list_profiles(),
+        'title': 'Профили запросов',
+    }
+    return render(request, 'core/profile_list.html', context)
+
+
+@staff_member_required
+def profile_file(request, name):
+    """Профиль: отчёт pstats текстом (?sort= из STATS_SORTS)
+    или HTML pyinstrument.
+
+    ?download=1 отдаёт исходный файл .prof для snakeviz и подобных.
+    """
+    path = profiling.profile_path(name)
+    if path is None:
+        raise Http404
+    if name.endswith('.html'):
+        return FileResponse(open(path, 'rb'), content_type='text/html')
+    if request.GET.get('download'):
+        return FileResponse(open(path, 'rb'), as_attachment=True)
+    sort = request.GET.get('sort')
+    if sort not in profiling.STATS_SORTS:
+        sort = profiling.STATS_SORTS[0]
+    return HttpResponse(
+        profiling.stats_text(path, sort),
+        content_type='text/plain; charset=utf-8',
+    )
@@ -1,6 +1,124 @@
-from django.contrib import admin
+import logging
 
-from .models import Comment, Follow, Group, Post
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import ACTION_CHECKBOX_NAME
+from django.contrib.admin.helpers import ActionForm
+from django.db.models import Count
+from django.http import StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.utils import timezone
+
+from core.bulk import BULK_CHUNK_SIZE, bulk_delete, bulk_update, iter_csv
+from core.cache import invalidate_public_pages
+from core.paginator import ApproximateCountPaginator
+
+from .delta import forget_latest_post
+from .models import Comment, Follow, Group, Post, User
+
+logger = logging.getLogger(__name__)
+
+POST_EXPORT_FIELDS = (
+    'pk', 'pub_date', 'author__username', 'group__slug', 'text',
+)
+COMMENT_EXPORT_FIELDS = (
+    'pk', 'created', 'post_id', 'author__username', 'text',
+)
+
+
+def log_progress(action):
+    def progress(done):
+        logger.info('%s: обработано строк: %d', action, done)
+    return progress
+
+
+class GroupActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        queryset=Group.objects.all(),
+        required=False,
+        label='Группа',
+        empty_label='-без группы-',
+    )
+
+
+def export_csv(queryset, fields, filename):
+    """Выгрузка queryset в CSV потоком, по BULK_CHUNK_SIZE строк."""
+    rows = queryset.order_by('pk').values_list(*fields).iterator(
+        chunk_size=BULK_CHUNK_SIZE
+    )
+    response = StreamingHttpResponse(
+        iter_csv(fields, rows), content_type='text/csv'
+    )
+    stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}-{stamp}.csv"'
+    )
+    return response
+
+
+def delete_by_author(modeladmin, request, queryset):
+    """Удаляет все записи авторов выбранных записей.
+
+    Как и встроенное delete_selected, сначала показывает страницу
+    подтверждения: удаление идёт в обход сигналов и необратимо.
+    """
+    model = queryset.model
+    authors = User.objects.filter(
+        pk__in=queryset.values('author_id')
+    ).order_by('username')
+    targets = model.objects.filter(author__in=authors)
+    if request.POST.get('post') != 'yes':
+        related = model._meta.get_field('author').related_query_name()
+        context = {
+            **modeladmin.admin_site.each_context(request),
+            'title': 'Вы уверены?',
+            'opts': model._meta,
+            # выбор переносится как в форме списка: флагом «выбраны все»
+            # или pk отмеченных строк, объекты не загружаются
+            'select_across': request.POST.get('select_across') == '1',
+            'selected': request.POST.getlist(ACTION_CHECKBOX_NAME),
+            'authors': authors.annotate(total=Count(related)),
+            'total': targets.count(),
+            'action_checkbox_name': ACTION_CHECKBOX_NAME,
+        }
+        request.current_app = modeladmin.admin_site.name
+        return TemplateResponse(
+            request, 'admin/delete_by_author_confirmation.html', context
+        )
+
+    scopes = public_page_scopes(targets) if model is Post else ()
+    deleted = bulk_delete(
+        targets,
+        progress=log_progress(f'{model.__name__}.delete_by_author'),
+    )
+    if model is Post:
+        # post_save/post_delete не отправлялись: кэш лент и маркер
+        # последнего поста сбрасываются здесь
+        invalidate_public_pages(*scopes)
+        forget_latest_post()
+    modeladmin.message_user(
+        request,
+        f'Удалено записей: {deleted}',
+        messages.SUCCESS,
+    )
+
+
+def public_page_scopes(posts):
+    """Области гостевого кэша лент, в которых показаны posts."""
+    posts = posts.order_by()
+    usernames = posts.values_list('author__username', flat=True).distinct()
+    slugs = posts.exclude(group=None).values_list(
+        'group__slug', flat=True
+    ).distinct()
+    return [
+        'index_page',
+        *(f'profile:{username}' for username in usernames),
+        *(f'group:{slug}' for slug in slugs),
+    ]
+
+
+delete_by_author.short_description = 'Удалить всё от авторов выбранных'
+delete_by_author.allowed_permissions = ('delete',)
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -10,9 +128,57 @@ class PostAdmin(admin.ModelAdmin):
                     'author',
                     'group')
     list_editable = ('group',)
-    search_fields = ('text',)
+    list_select_related = ('author', 'group')
+    search_fields = ('text', 'author__username')
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+    action_form = GroupActionForm
+    actions = ('reassign_group', delete_by_author, 'export_selected')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'group' and request is not None:
+            # list_editable строит форму для каждой строки; без кэша
+            # список групп запрашивался бы из базы для каждой из них
+            if not hasattr(request, 'group_choices'):
+                request.group_choices = list(field.choices)
+            field.choices = request.group_choices
+        return field
+
+    def reassign_group(self, request, queryset):
+        group = Group.objects.filter(
+            pk=request.POST.get('group') or None
+        ).first()
+        slugs = set(
+            queryset.exclude(group=None).values_list('group__slug', flat=True)
+        )
+        if group is not None:
+            slugs.add(group.slug)
+        updated = bulk_update(
+            queryset,
+            {'group': group},
+            progress=log_progress('Post.reassign_group'),
+        )
+        # update() не отправляет post_save, кэш лент сбрасывается здесь
+        invalidate_public_pages(
+            'index_page', *(f'group:{slug}' for slug in slugs)
+        )
+        self.message_user(
+            request,
+            f'Группа изменена у записей: {updated}',
+            messages.SUCCESS,
+        )
+
+    reassign_group.short_description = 'Перенести выбранные в группу'
+    reassign_group.allowed_permissions = ('change',)
+
+    def export_selected(self, request, queryset):
+        return export_csv(queryset, POST_EXPORT_FIELDS, 'posts')
+
+    export_selected.short_description = 'Выгрузить выбранные в CSV'
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -27,13 +193,23 @@ class GroupAdmin(admin.ModelAdmin):
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('pk', 'post', 'author', 'text', 'created')
-    search_fields = ('post', 'author', 'text')
+    list_select_related = ('post', 'author')
+    search_fields = ('author__username', 'text')
     empty_value_display = '-пусто-'
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+    actions = (delete_by_author, 'export_selected')
+
+    def export_selected(self, request, queryset):
+        return export_csv(queryset, COMMENT_EXPORT_FIELDS, 'comments')
+
+    export_selected.short_description = 'Выгрузить выбранные в CSV'
 
 
 class FollowAdmin(admin.ModelAdmin):
     list_display = ('user', 'author')
-    search_fields = ('user', 'author')
+    list_select_related = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
     empty_value_display = '-пусто-'
 
 
@@ -0,0 +1,58 @@
+from django.db import transaction
+
+from core.bulk import check_on_delete, delete_cascade
+
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+POST_FIELDS = (
+    'id', 'text', 'excerpt', 'rendered_html', 'pub_date', 'author_id',
+    'group_id', 'image',
+)
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'created')
+
+
+def archive_batch(cutoff, batch_size):
+    """Переносит до batch_size постов старше cutoff вместе с комментариями.
+
+    Перенос одной порции — одна транзакция: пост либо в Post, либо
+    в ArchivedPost. Возвращает число перенесённых постов и комментариев.
+    """
+    check_on_delete(Post)
+    with transaction.atomic():
+        post_ids = list(
+            Post.objects.filter(pub_date__lt=cutoff).order_by(
+                'pk'
+            ).values_list('pk', flat=True)[:batch_size]
+        )
+        if not post_ids:
+            return 0, 0
+
+        posts = Post.objects.filter(pk__in=post_ids).values(*POST_FIELDS)
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(**values) for values in posts
+        )
+        comments = Comment.objects.filter(
+            post_id__in=post_ids
+        ).values(*COMMENT_FIELDS)
+        archived_comments = ArchivedComment.objects.bulk_create(
+            ArchivedComment(**values) for values in comments
+        )
+        delete_cascade(Post, post_ids, Post.objects.db)
+    return len(post_ids), len(archived_comments)
+
+
+def archive_posts(cutoff, batch_size, max_batches=None, progress=None):
+    """Переносит посты порциями, пока они не кончатся или не будет
+    выполнено max_batches порций. progress(посты, комментарии)
+    вызывается после каждой порции с нарастающим итогом."""
+    total_posts = total_comments = batches = 0
+    while max_batches is None or batches < max_batches:
+        posts, comments = archive_batch(cutoff, batch_size)
+        if not posts:
+            break
+        batches += 1
+        total_posts += posts
+        total_comments += comments
+        if progress is not None:
+            progress(total_posts, total_comments)
+    return total_posts, total_comments
@@ -0,0 +1,198 @@
+import logging
+import sqlite3
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from core.db import configure_sqlite
+
+from . import trending
+from .models import Comment, Post, User
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS comment_queue ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+    'post_id INTEGER NOT NULL, '
+    'author_id INTEGER NOT NULL, '
+    'text TEXT NOT NULL, '
+    'created TEXT NOT NULL)'
+)
+# комментарии к удалённым или архивированным постам и от удалённых
+# пользователей: в базу их не записать, но и терять молча не стоит
+DEAD_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS comment_queue_dead ('
+    'id INTEGER PRIMARY KEY, '
+    'post_id INTEGER NOT NULL, '
+    'author_id INTEGER NOT NULL, '
+    'text TEXT NOT NULL, '
+    'created TEXT NOT NULL)'
+)
+INDEX = (
+    'CREATE INDEX IF NOT EXISTS comment_queue_post_author '
+    'ON comment_queue (post_id, author_id)'
+)
+
+
+def connect():
+    """Соединение с файлом очереди settings.COMMENT_QUEUE_PATH.
+
+    Очередь — отдельная база SQLite в режиме WAL: запись в неё
+    не ждёт блокировки основной базы, а сама запись переживает
+    перезапуск процесса.
+    """
+    db = sqlite3.connect(settings.COMMENT_QUEUE_PATH, timeout=30)
+    configure_sqlite(db)
+    db.execute(SCHEMA)
+    db.execute(DEAD_SCHEMA)
+    db.execute(INDEX)
+    return db
+
+
+def enqueue(post_id, author_id, text, created=None):
+    """Кладёт комментарий в очередь вместо INSERT в posts_comment."""
+    created = timezone.now() if created is None else created
+    db = connect()
+    try:
+        with db:
+            db.execute(
+                'INSERT INTO comment_queue '
+                '(post_id, author_id, text, created) VALUES (?, ?, ?, ?)',
+                (post_id, author_id, text, created.isoformat()),
+            )
+    finally:
+        db.close()
+
+
+def pending(post_id, author):
+    """Ещё не записанные в базу комментарии author к посту.
+
+    Нужны, чтобы автор сразу видел свой комментарий на странице поста.
+    """
+    db = connect()
+    try:
+        rows = db.execute(
+            'SELECT text, created FROM comment_queue '
+            'WHERE post_id = ? AND author_id = ? ORDER BY id DESC',
+            (post_id, author.pk),
+        ).fetchall()
+    finally:
+        db.close()
+    return [
+        Comment(
+            post_id=post_id,
+            author=author,
+            text=text,
+            created=datetime.fromisoformat(created),
+        )
+        for text, created in rows
+    ]
+
+
+def flush(batch_size=None):
+    """Переносит комментарии из очереди в базу порциями.
+
+    Комментарии, чей пост или автор уже удалён (или пост перенесён
+    в архив), переносятся в таблицу comment_queue_dead. Порция
+    удаляется из очереди только после коммита в основную базу;
+    если процесс упадёт между этими шагами, порция будет записана
+    повторно. Вставка идёт в обход post_save, поэтому сигнал
+    отправляется здесь — для потока post_events — с raw=True,
+    а популярное обновляется одной транзакцией на порцию.
+    Возвращает число записанных комментариев.
+    """
+    batch_size = batch_size or settings.COMMENT_FLUSH_BATCH
+    db = connect()
+    flushed = 0
+    try:
+        while True:
+            rows = db.execute(
+                'SELECT id, post_id, author_id, text, created '
+                'FROM comment_queue ORDER BY id LIMIT ?',
+                (batch_size,),
+            ).fetchall()
+            if not rows:
+                return flushed
+            rows, dead = split_orphans(rows)
+            comments = [
+                Comment(
+                    post_id=post_id,
+                    author_id=author_id,
+                    text=text,
+                    created=datetime.fromisoformat(created),
+                )
+                for _, post_id, author_id, text, created in rows
+            ]
+            with transaction.atomic():
+                insert_comments(comments)
+            with db:
+                if dead:
+                    db.executemany(
+                        'INSERT OR REPLACE INTO comment_queue_dead '
+                        '(id, post_id, author_id, text, created) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        dead,
+                    )
+                db.executemany(
+                    'DELETE FROM comment_queue WHERE id = ?',
+                    [(row[0],) for row in rows + dead],
+                )
+            if dead:
+                logger.warning(
+                    'Комментарии без поста или автора отложены '
+                    'в comment_queue_dead: %d', len(dead),
+                )
+            weights = Counter()
+            for comment in comments:
+                weights[comment.post_id] += trending.COMMENT_WEIGHT
+            trending.record_activities(weights)
+            for comment in comments:
+                post_save.send(
+                    sender=Comment, instance=comment, created=True, raw=True,
+                    using=Comment.objects.db, update_fields=None,
+                )
+            flushed += len(comments)
+    finally:
+        db.close()
+
+
+def split_orphans(rows):
+    """Делит строки очереди на те, что можно записать, и сироты."""
+    post_ids = set(Post.objects.filter(
+        pk__in={row[1] for row in rows}
+    ).values_list('pk', flat=True))
+    author_ids = set(User.objects.filter(
+        pk__in={row[2] for row in rows}
+    ).values_list('pk', flat=True))
+    valid, dead = [], []
+    for row in rows:
+        if row[1] in post_ids and row[2] in author_ids:
+            valid.append(row)
+        else:
+            dead.append(row)
+    return valid, dead
+
+
+def insert_comments(comments):
+    """INSERT с сохранением времени из очереди.
+
+    bulk_create заменил бы created (auto_now_add) временем записи;
+    raw-вставка, как при loaddata, берёт значения полей как есть.
+    """
+    if not comments:
+        return
+    fields = [
+        field for field in Comment._meta.concrete_fields
+        if not field.primary_key
+    ]
+    connection = connections[Comment.objects.db]
+    size = connection.ops.bulk_batch_size(fields, comments) or len(comments)
+    for start in range(0, len(comments), size):
+        Comment._base_manager._insert(
+            comments[start:start + size], fields=fields, raw=True,
+        )
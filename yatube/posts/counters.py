@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Post
+
+# запросы с этим заголовком (прогрев кэша warm_cache) не считаются просмотрами
+WARMUP_HEADER: str = 'X-Cache-Warmup'
+WARMUP_META_KEY: str = 'HTTP_X_CACHE_WARMUP'
+_lock = threading.Lock()
+_pending = Counter()
+_state = {'last_flush': time.monotonic()}
+
+
+def record_view(post_id):
+    """Учитывает просмотр поста в памяти процесса.
+
+    В базу счётчики попадают пачкой (flush_views) не чаще раза
+    в VIEW_COUNTS_FLUSH_INTERVAL секунд. Несброшенные просмотры
+    теряются при остановке процесса: точность счётчика обменяна
+    на отсутствие UPDATE в каждом запросе.
+    """
+    with _lock:
+        _pending[post_id] += 1
+        overflow = len(_pending) >= settings.VIEW_COUNTS_MAX_PENDING
+    if overflow:
+        flush_views()
+
+
+def is_warmup(request):
+    return WARMUP_META_KEY in request.META
+
+
+def pending_views(post_id):
+    with _lock:
+        return _pending[post_id]
+
+
+def flush_views():
+    """Записывает накопленные просмотры одним UPDATE ... CASE."""
+    with _lock:
+        counts = dict(_pending)
+        _pending.clear()
+        _state['last_flush'] = time.monotonic()
+    if not counts:
+        return 0
+    Post.objects.filter(pk__in=counts).update(
+        views=F('views') + Case(
+            *[When(pk=pk, then=Value(count)) for pk, count in counts.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    )
+    return sum(counts.values())
+
+
+def flush_views_periodically(**kwargs):
+    """Обработчик request_finished: сбрасывает счётчики по интервалу."""
+    interval = settings.VIEW_COUNTS_FLUSH_INTERVAL
+    if time.monotonic() - _state['last_flush'] >= interval:
+        flush_views()
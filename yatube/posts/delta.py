@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.urls import reverse
+
+from core.paginator import decode_cursor, encode_cursor, keyset_filter
+
+from .models import Post
+
+DELTA_ORDERING = ('-pub_date', '-pk')
+DELTA_LIMIT: int = 50
+LATEST_POST_KEY = 'posts.latest_marker'
+LATEST_POST_TIMEOUT: int = 20
+
+
+def delta_fields():
+    opts = Post._meta
+    return [opts.get_field('pub_date'), opts.pk]
+
+
+def latest_post_marker():
+    """(pub_date, pk) самого нового поста или None, из кэша.
+
+    Ключ удаляется при создании поста (posts.signals); в других
+    процессах маркер устаревает не дольше LATEST_POST_TIMEOUT секунд.
+    """
+    marker = cache.get(LATEST_POST_KEY)
+    if marker is None:
+        latest = Post.objects.order_by(*DELTA_ORDERING).values_list(
+            'pub_date', 'pk'
+        ).first()
+        marker = latest or ()
+        cache.set(LATEST_POST_KEY, marker, LATEST_POST_TIMEOUT)
+    return tuple(marker) or None
+
+
+def forget_latest_post():
+    cache.delete(LATEST_POST_KEY)
+
+
+def feed_delta(queryset, cursor):
+    """Посты queryset новее курсора (не больше DELTA_LIMIT).
+
+    Без курсора или с испорченным курсором возвращает пустую дельту
+    с курсором на самый новый пост — с него клиент начинает опрос.
+    Если новых постов нет ни в одной ленте, база не запрашивается.
+    """
+    latest = latest_post_marker()
+    since = decode_cursor(cursor, delta_fields()) if cursor else None
+    if since is None or latest is None or tuple(since) >= latest:
+        marker = latest if since is None else since
+        return {
+            'count': 0,
+            'has_more': False,
+            'cursor': encode_cursor(marker) if marker else None,
+            'posts': [],
+        }
+
+    posts = list(
+        queryset.select_related('author', 'group').filter(
+            keyset_filter(DELTA_ORDERING, since, newer=True)
+        ).order_by(*DELTA_ORDERING)[:DELTA_LIMIT + 1]
+    )
+    # has_more: новых постов больше DELTA_LIMIT и отданы только самые
+    # новые из них — клиенту проще перезагрузить ленту целиком
+    has_more = len(posts) > DELTA_LIMIT
+    posts = posts[:DELTA_LIMIT]
+    if posts:
+        cursor = encode_cursor([posts[0].pub_date, posts[0].pk])
+    return {
+        'count': len(posts),
+        'has_more': has_more,
+        'cursor': cursor,
+        'posts': [serialize_post(post) for post in posts],
+    }
+
+
+def serialize_post(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'html': post.rendered_html,
+        'pub_date': post.pub_date.isoformat(),
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'url': reverse('posts:post_detail', args=(post.pk,)),
+    }
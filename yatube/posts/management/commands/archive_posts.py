@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.archive import archive_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит старые посты и их комментарии в архивные таблицы '
+        'порциями. Можно прерывать и запускать повторно.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ARCHIVE_POSTS_AFTER_DAYS,
+            help='Архивировать посты старше стольких дней.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.ARCHIVE_BATCH_SIZE,
+            help='Сколько постов переносить за одну транзакцию.',
+        )
+        parser.add_argument(
+            '--max-batches', type=int, default=None,
+            help='Остановиться после стольких порций.',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        def progress(posts, comments):
+            self.stdout.write(
+                f'Перенесено постов: {posts}, комментариев: {comments}'
+            )
+
+        posts, comments = archive_posts(
+            cutoff,
+            options['batch_size'],
+            max_batches=options['max_batches'],
+            progress=progress,
+        )
+        self.stdout.write(
+            f'Готово: постов {posts}, комментариев {comments}'
+        )
@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Count
+
+from posts.models import Group, Post, User
+from posts.views import POSTS_ON_PAGE, with_previews
+
+
+def value_size(value):
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, (bytes, memoryview)):
+        return len(value)
+    return len(str(value))
+
+
+def fetched_bytes(queryset):
+    """Сколько байт данных вернула база на запрос queryset."""
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return sum(value_size(value) for row in rows for value in row)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает объём данных, которые база отдаёт на страницу лент '
+        'index, group_list, profile и follow: полные строки постов '
+        'и выборка with_previews.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=5,
+            help='Сколько первых страниц каждой ленты измерить.',
+        )
+
+    def handle(self, *args, **options):
+        for name, posts in self.feeds():
+            full = previews = 0
+            for page in range(options['pages']):
+                bounds = slice(
+                    page * POSTS_ON_PAGE, (page + 1) * POSTS_ON_PAGE
+                )
+                full += fetched_bytes(
+                    posts.select_related('author', 'group')[bounds]
+                )
+                previews += fetched_bytes(with_previews(posts)[bounds])
+            if not full:
+                self.stdout.write(f'{name}: нет постов')
+                continue
+            pages = options['pages']
+            self.stdout.write(
+                f'{name}: полные строки {full / pages / 1024:.1f} КБ/стр., '
+                f'превью {previews / pages / 1024:.1f} КБ/стр. '
+                f'({previews / full:.0%})'
+            )
+
+    @staticmethod
+    def feeds():
+        yield 'index', Post.objects.all()
+        group = Group.objects.annotate(
+            posts_count=Count('posts')
+        ).order_by('-posts_count').first()
+        if group is not None:
+            yield f'group_list {group.slug}', group.posts.all()
+        author = User.objects.annotate(
+            posts_count=Count('posts')
+        ).order_by('-posts_count').first()
+        if author is not None:
+            yield f'profile {author.username}', author.posts.all()
+        reader = User.objects.annotate(
+            follows_count=Count('follower')
+        ).order_by('-follows_count').first()
+        if reader is not None:
+            yield (
+                f'follow {reader.username}',
+                Post.objects.filter(author__following__user=reader),
+            )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.previews import fetch_pending
+
+
+class Command(BaseCommand):
+    help = 'Загружает метаданные карточек ссылок, ожидающих загрузки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help='Обработать не больше стольких карточек.',
+        )
+
+    def handle(self, *args, **options):
+        done = fetch_pending(options['limit'])
+        self.stdout.write(f'Обработано карточек: {done}')
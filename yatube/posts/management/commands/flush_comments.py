@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.comment_queue import flush
+
+
+class Command(BaseCommand):
+    help = (
+        'Записывает в базу комментарии из очереди отложенной записи '
+        '(settings.COMMENTS_WRITE_BEHIND).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.COMMENT_FLUSH_BATCH,
+            help='Сколько комментариев записывать одним bulk_create.',
+        )
+        parser.add_argument(
+            '--watch', type=float, default=0,
+            help='Не завершаться, а повторять раз в столько секунд.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            flushed = flush(options['batch_size'])
+            if flushed or not options['watch']:
+                self.stdout.write(f'Записано комментариев: {flushed}')
+            if not options['watch']:
+                return
+            time.sleep(options['watch'])
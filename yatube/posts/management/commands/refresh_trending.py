@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import refresh_trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает топ популярных постов и групп. '
+        'Запускается периодически, например из cron.'
+    )
+
+    def handle(self, *args, **options):
+        entries = refresh_trending()
+        self.stdout.write(f'Записано строк топа: {entries}')
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.bulk import BULK_CHUNK_SIZE, iter_pk_chunks
+from posts.models import Post
+from posts.tags import index_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново разбирает хэштеги и упоминания существующих постов '
+        'порциями. Можно прерывать и запускать повторно.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BULK_CHUNK_SIZE,
+            help='Сколько постов обрабатывать за одну транзакцию.',
+        )
+
+    def handle(self, *args, **options):
+        done = 0
+        for pks in iter_pk_chunks(Post.objects.all(), options['batch_size']):
+            rows = Post.objects.filter(pk__in=pks).values_list('pk', 'text')
+            with transaction.atomic():
+                index_posts(list(rows))
+            done += len(pks)
+            self.stdout.write(f'Обработано постов: {done}')
+        self.stdout.write(f'Готово, постов: {done}')
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from core.bulk import BULK_CHUNK_SIZE, iter_pk_chunks
+from posts.markup import make_excerpt, render_text
+from posts.models import ArchivedPost, Post
+
+RENDERED_FIELDS = ('excerpt', 'rendered_html')
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет excerpt и rendered_html постов и архивных постов '
+        'порциями. Без --all обрабатывает только ещё не отрендеренные.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перерендерить все посты, например после смены разметки.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BULK_CHUNK_SIZE,
+            help='Сколько постов обновлять одним запросом.',
+        )
+
+    def handle(self, *args, **options):
+        for model in (Post, ArchivedPost):
+            queryset = model.objects.all()
+            if not options['all']:
+                queryset = queryset.filter(rendered_html='')
+            done = 0
+            for pks in iter_pk_chunks(queryset, options['batch_size']):
+                posts = list(
+                    model.objects.filter(pk__in=pks).only('pk', 'text')
+                )
+                for post in posts:
+                    post.rendered_html = render_text(post.text)
+                    post.excerpt = make_excerpt(post.rendered_html)
+                model.objects.bulk_update(posts, RENDERED_FIELDS)
+                done += len(posts)
+                self.stdout.write(f'{model.__name__}: обработано {done}')
+            self.stdout.write(f'{model.__name__}: готово, {done}')
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.notifications import send_digests
+
+
+class Command(BaseCommand):
+    help = (
+        'Рассылает подписчикам письма с новыми постами авторов '
+        'с прошлого запуска. Запускается периодически, например из cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.DIGEST_CHUNK_SIZE,
+            help='Сколько подписчиков обрабатывать за раз.',
+        )
+
+    def handle(self, *args, **options):
+        sent = send_digests(chunk_size=options['chunk_size'])
+        self.stdout.write(f'Отправлено писем: {sent}')
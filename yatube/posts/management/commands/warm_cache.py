@@ -0,0 +1,146 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from sorl.thumbnail import get_thumbnail
+
+from posts.counters import WARMUP_HEADER, WARMUP_META_KEY
+from posts.models import Group, Post, User
+
+# размеры миниатюр из шаблонов group_list.html и post_detail.html
+THUMBNAIL_GEOMETRIES = ('320x113', '960x339')
+WARM_TIMEOUT: int = 30
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает кэш страниц и миниатюр после деплоя: первые страницы '
+        'главной, ленты популярных групп и авторов, свежие посты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=3,
+            help='Сколько первых страниц каждой ленты прогреть.',
+        )
+        parser.add_argument(
+            '--groups', type=int, default=10,
+            help='Сколько групп с наибольшим числом постов прогреть.',
+        )
+        parser.add_argument(
+            '--profiles', type=int, default=10,
+            help='Сколько профилей с наибольшим числом подписчиков прогреть.',
+        )
+        parser.add_argument(
+            '--posts', type=int, default=50,
+            help='Сколько последних постов прогреть.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='Количество потоков.',
+        )
+        parser.add_argument(
+            '--base-url',
+            help=(
+                'Адрес запущенного сайта, например http://localhost:8000. '
+                'Нужен для кэша в памяти процесса (LocMemCache): без него '
+                'страницы рендерятся внутри команды и попадают только '
+                'в общий кэш (memcached, redis).'
+            ),
+        )
+        parser.add_argument(
+            '--host', default='localhost',
+            help='Заголовок Host для рендера внутри команды.',
+        )
+
+    def handle(self, *args, **options):
+        urls = self.collect_urls(options)
+        if options['base_url']:
+            base_url = options['base_url'].rstrip('/')
+            fetch = self.http_fetcher(base_url)
+        else:
+            fetch = self.client_fetcher(options['host'])
+
+        posts = list(Post.objects.exclude(image='')[:options['posts']])
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            statuses = list(executor.map(self.in_thread(fetch), urls))
+            thumbnails = sum(executor.map(
+                self.in_thread(self.prime_thumbnails), posts
+            ))
+
+        failed = [
+            url for url, status in zip(urls, statuses) if status != 200
+        ]
+        for url in failed:
+            self.stderr.write(f'Не удалось прогреть {url}')
+        self.stdout.write(
+            f'Прогрето страниц: {len(urls) - len(failed)} из {len(urls)}, '
+            f'миниатюр: {thumbnails}'
+        )
+
+    @staticmethod
+    def collect_urls(options):
+        pages = range(1, options['pages'] + 1)
+
+        def feed(url):
+            return [url] + [f'{url}?page={page}' for page in pages[1:]]
+
+        urls = feed(reverse('posts:index'))
+        groups = Group.objects.annotate(
+            posts_count=Count('posts')
+        ).order_by('-posts_count').values_list('slug', flat=True)
+        for slug in groups[:options['groups']]:
+            urls += feed(reverse('posts:group_list', args=(slug,)))
+        authors = User.objects.annotate(
+            followers_count=Count('following')
+        ).order_by('-followers_count').values_list('username', flat=True)
+        for username in authors[:options['profiles']]:
+            urls += feed(reverse('posts:profile', args=(username,)))
+        post_ids = Post.objects.values_list('pk', flat=True)
+        urls += [
+            reverse('posts:post_detail', args=(post_id,))
+            for post_id in post_ids[:options['posts']]
+        ]
+        return urls
+
+    @staticmethod
+    def in_thread(func):
+        """Закрывает соединение с БД, открытое рабочим потоком."""
+        def wrapper(*args):
+            try:
+                return func(*args)
+            finally:
+                connections.close_all()
+        return wrapper
+
+    @staticmethod
+    def http_fetcher(base_url):
+        def fetch(url):
+            try:
+                request = Request(base_url + url, headers={WARMUP_HEADER: '1'})
+                with urlopen(request, timeout=WARM_TIMEOUT) as response:
+                    response.read()
+                    return response.status
+            except HTTPError as error:
+                return error.code
+            except URLError:
+                return None
+        return fetch
+
+    @staticmethod
+    def client_fetcher(host):
+        def fetch(url):
+            client = Client(HTTP_HOST=host, **{WARMUP_META_KEY: '1'})
+            return client.get(url).status_code
+        return fetch
+
+    @staticmethod
+    def prime_thumbnails(post):
+        for geometry in THUMBNAIL_GEOMETRIES:
+            get_thumbnail(post.image, geometry, crop='center', upscale=True)
+        return len(THUMBNAIL_GEOMETRIES)
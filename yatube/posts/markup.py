@@ -0,0 +1,87 @@
+import re
+from html import escape, unescape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from django.utils.html import linebreaks, strip_tags
+from django.utils.text import Truncator
+
+try:
+    import markdown
+except ImportError:
+    markdown = None
+
+EXCERPT_LENGTH: int = 200
+ALLOWED_TAGS = frozenset((
+    'a', 'blockquote', 'br', 'code', 'em', 'h1', 'h2', 'h3', 'h4', 'h5',
+    'h6', 'hr', 'li', 'ol', 'p', 'pre', 'strong', 'ul',
+))
+ALLOWED_ATTRIBUTES = {'a': ('href', 'title')}
+ALLOWED_SCHEMES = ('', 'http', 'https', 'mailto')
+# хэштег в начале строки (#django) Markdown принял бы за заголовок;
+# заголовком считается только # с пробелом после него
+HASHTAG_LINE_RE = re.compile(r'^( {0,3})#(?=\w)', re.MULTILINE)
+# содержимое этих тегов выбрасывается вместе с ними
+DROPPED_TAGS = frozenset(('script', 'style'))
+
+
+class Sanitizer(HTMLParser):
+    """Оставляет из HTML только теги ALLOWED_TAGS с разрешёнными
+    атрибутами; текст остальных тегов сохраняется экранированным."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.dropped = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            self.dropped += 1
+        if self.dropped or tag not in ALLOWED_TAGS:
+            return
+        allowed = ALLOWED_ATTRIBUTES.get(tag, ())
+        attributes = ''.join(
+            f' {name}="{escape(value)}"' for name, value in attrs
+            if name in allowed and value is not None
+            and (name != 'href' or is_safe_url(value))
+        )
+        if tag == 'a':
+            attributes += ' rel="nofollow noopener"'
+        self.parts.append(f'<{tag}{attributes}>')
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self.dropped = max(self.dropped - 1, 0)
+        elif not self.dropped and tag in ALLOWED_TAGS and tag not in (
+            'br', 'hr',
+        ):
+            self.parts.append(f'</{tag}>')
+
+    def handle_data(self, data):
+        if not self.dropped:
+            self.parts.append(escape(data, quote=False))
+
+
+def is_safe_url(url):
+    return urlsplit(url.strip()).scheme.lower() in ALLOWED_SCHEMES
+
+
+def sanitize(html):
+    sanitizer = Sanitizer()
+    sanitizer.feed(html)
+    sanitizer.close()
+    return ''.join(sanitizer.parts)
+
+
+def render_text(text):
+    """HTML текста поста: Markdown, если он установлен, иначе абзацы
+    и переносы строк. Результат можно выводить без экранирования."""
+    if markdown is None:
+        return linebreaks(text, autoescape=True)
+    return sanitize(markdown.markdown(HASHTAG_LINE_RE.sub(r'\1\\#', text)))
+
+
+def make_excerpt(html, length=EXCERPT_LENGTH):
+    """Начало отрендеренного поста обычным текстом, в одну строку."""
+    plain = ' '.join(unescape(strip_tags(html)).split())
+    return Truncator(plain).chars(length)
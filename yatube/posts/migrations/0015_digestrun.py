@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window_end', models.DateTimeField(db_index=True, verbose_name='Конец окна')),
+                ('emails', models.PositiveIntegerField(default=0, verbose_name='Отправлено писем')),
+            ],
+            options={
+                'ordering': ['-window_end'],
+            },
+        ),
+    ]
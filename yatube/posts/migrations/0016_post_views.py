@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_digestrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='views',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='Просмотры'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LinkPreview',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url_hash', models.CharField(max_length=64, unique=True, verbose_name='SHA-256 адреса')),
+                ('url', models.TextField(verbose_name='Адрес')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает загрузки'), ('ready', 'Загружена'), ('failed', 'Ошибка загрузки')], db_index=True, default='pending', max_length=16, verbose_name='Состояние')),
+                ('title', models.CharField(blank=True, max_length=300, verbose_name='Заголовок')),
+                ('description', models.TextField(blank=True, verbose_name='Описание')),
+                ('image_url', models.TextField(blank=True, verbose_name='Картинка')),
+                ('site_name', models.CharField(blank=True, max_length=200, verbose_name='Сайт')),
+                ('fetched', models.DateTimeField(blank=True, null=True, verbose_name='Дата загрузки')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='links',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='posts', to='posts.LinkPreview', verbose_name='Ссылки'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_tags_mentions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='excerpt',
+            field=models.CharField(blank=True, max_length=200, verbose_name='Начало поста'),
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='rendered_html',
+            field=models.TextField(blank=True, verbose_name='HTML поста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=200, verbose_name='Начало поста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='rendered_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML поста'),
+        ),
+    ]
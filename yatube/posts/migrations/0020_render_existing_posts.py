@@ -0,0 +1,38 @@
+from django.db import migrations
+
+from posts.markup import make_excerpt, render_text
+
+BATCH_SIZE = 2000
+
+
+def render_existing_posts(apps, schema_editor):
+    """Заполняет rendered_html и excerpt постов, созданных до 0019."""
+    for model_name in ('Post', 'ArchivedPost'):
+        model = apps.get_model('posts', model_name)
+        last_pk = 0
+        while True:
+            posts = list(
+                model.objects.filter(
+                    pk__gt=last_pk, rendered_html='',
+                ).order_by('pk').only('pk', 'text')[:BATCH_SIZE]
+            )
+            if not posts:
+                break
+            for post in posts:
+                post.rendered_html = render_text(post.text)
+                post.excerpt = make_excerpt(post.rendered_html)
+            model.objects.bulk_update(posts, ('rendered_html', 'excerpt'))
+            last_pk = posts[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_post_rendered_html'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            render_existing_posts, migrations.RunPython.noop,
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .markup import EXCERPT_LENGTH, make_excerpt, render_text
+
 User = get_user_model()
 
 POST_STR_DESC: int = 15
@@ -34,6 +36,7 @@ class Post(models.Model):
     pub_date = models.DateTimeField(
         'Дата публикации',
         auto_now_add=True,
+        db_index=True,
         help_text='Дата публикации',
     )
     author = models.ForeignKey(
@@ -57,12 +60,69 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True,
     )
+    views = models.PositiveIntegerField(
+        'Просмотры',
+        default=0,
+        db_index=True,
+        editable=False,
+    )
+    excerpt = models.CharField(
+        'Начало поста',
+        max_length=EXCERPT_LENGTH,
+        blank=True,
+        editable=False,
+    )
+    rendered_html = models.TextField(
+        'HTML поста',
+        blank=True,
+        editable=False,
+    )
+    tags = models.ManyToManyField(
+        'Tag',
+        related_name='posts',
+        blank=True,
+        editable=False,
+        verbose_name='Хэштеги',
+    )
+    mentions = models.ManyToManyField(
+        User,
+        related_name='mentioned_in',
+        blank=True,
+        editable=False,
+        verbose_name='Упоминания',
+    )
+    links = models.ManyToManyField(
+        'LinkPreview',
+        related_name='posts',
+        blank=True,
+        editable=False,
+        verbose_name='Ссылки',
+    )
 
     class Meta:
         ordering = ['-pub_date', ]
+        indexes = [
+            # последний пост группы для каталога групп
+            models.Index(fields=['group', '-pub_date']),
+        ]
 
     def __str__(self):
-        return self.text[:POST_STR_DESC]
+        return (self.excerpt or self.text)[:POST_STR_DESC]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.render()
+            if update_fields is not None:
+                kwargs['update_fields'] = {
+                    *update_fields, 'excerpt', 'rendered_html',
+                }
+        super().save(*args, **kwargs)
+
+    def render(self):
+        """Заполняет rendered_html и excerpt по тексту поста."""
+        self.rendered_html = render_text(self.text)
+        self.excerpt = make_excerpt(self.rendered_html)
 
 
 class Comment(models.Model):
@@ -110,5 +170,200 @@ class Follow(models.Model):
         verbose_name='Автор',
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow',
+            ),
+        ]
+
     def __str__(self):
         return f'{self.user.username} -> {self.author.username}'
+
+
+class PostActivity(models.Model):
+    """Рейтинг активности поста, затухающий со временем.
+
+    Хранит рейтинг на момент updated: при новой активности старое значение
+    уменьшается по периоду полураспада и к нему прибавляется вес события.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='activity',
+        verbose_name='Пост',
+    )
+    score = models.FloatField(
+        'Рейтинг',
+        default=0,
+    )
+    updated = models.DateTimeField(
+        'Дата обновления рейтинга',
+        db_index=True,
+    )
+
+
+class TrendingEntry(models.Model):
+    """Строка предрассчитанного топа (пересобирает refresh_trending)."""
+    POSTS = 'posts'
+    GROUP_POSTS = 'group_posts'
+    GROUPS = 'groups'
+    SCOPE_CHOICES = (
+        (POSTS, 'Популярные посты'),
+        (GROUP_POSTS, 'Популярные посты группы'),
+        (GROUPS, 'Популярные группы'),
+    )
+
+    scope = models.CharField(
+        'Топ',
+        max_length=16,
+        choices=SCOPE_CHOICES,
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='+',
+        blank=True,
+        null=True,
+        verbose_name='Группа',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        blank=True,
+        null=True,
+        verbose_name='Пост',
+    )
+    rank = models.PositiveIntegerField('Место')
+    score = models.FloatField('Рейтинг')
+
+    class Meta:
+        ordering = ['rank', ]
+        indexes = [
+            models.Index(fields=['scope', 'group', 'rank']),
+        ]
+
+
+class ArchivedPost(models.Model):
+    """Пост, перенесённый из Post командой archive_posts.
+
+    id совпадает с id исходного поста, поэтому старые ссылки
+    продолжают работать через запасной поиск в post_detail.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Содержимое поста')
+    excerpt = models.CharField(
+        'Начало поста', max_length=EXCERPT_LENGTH, blank=True,
+    )
+    rendered_html = models.TextField('HTML поста', blank=True)
+    pub_date = models.DateTimeField('Дата публикации', db_index=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор',
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        blank=True,
+        null=True,
+        verbose_name='Группа',
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True,
+    )
+    archived = models.DateTimeField('Дата архивации', auto_now_add=True)
+
+    class Meta:
+        ordering = ['-pub_date', ]
+
+    def __str__(self):
+        return (self.excerpt or self.text)[:POST_STR_DESC]
+
+
+class ArchivedComment(models.Model):
+    """Комментарий к архивному посту."""
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        related_name='comments',
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        related_name='archived_comments',
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+    )
+    text = models.TextField('Содержимое комментария')
+    created = models.DateTimeField('Дата публикации комментария')
+
+    class Meta:
+        ordering = ['-created', ]
+
+
+class DigestRun(models.Model):
+    """Запуск рассылки send_digests.
+
+    window_end последнего запуска — начало окна следующего: в письмо
+    попадают посты, опубликованные между двумя запусками.
+    """
+    window_end = models.DateTimeField('Конец окна', db_index=True)
+    emails = models.PositiveIntegerField('Отправлено писем', default=0)
+
+    class Meta:
+        ordering = ['-window_end', ]
+
+
+class Tag(models.Model):
+    """Хэштег из текста постов, в нижнем регистре."""
+    name = models.CharField('Хэштег', max_length=100, unique=True)
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class LinkPreview(models.Model):
+    """Карточка ссылки из текста поста.
+
+    Одна строка на URL для всех постов: метаданные страницы загружаются
+    один раз фоновым обработчиком (posts.previews), а не при рендере.
+    """
+    PENDING = 'pending'
+    READY = 'ready'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Ожидает загрузки'),
+        (READY, 'Загружена'),
+        (FAILED, 'Ошибка загрузки'),
+    )
+
+    url_hash = models.CharField(
+        'SHA-256 адреса',
+        max_length=64,
+        unique=True,
+    )
+    url = models.TextField('Адрес')
+    status = models.CharField(
+        'Состояние',
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        db_index=True,
+    )
+    title = models.CharField('Заголовок', max_length=300, blank=True)
+    description = models.TextField('Описание', blank=True)
+    image_url = models.TextField('Картинка', blank=True)
+    site_name = models.CharField('Сайт', max_length=200, blank=True)
+    fetched = models.DateTimeField('Дата загрузки', blank=True, null=True)
+
+    def __str__(self):
+        return self.url
@@ -0,0 +1,93 @@
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import DigestRun, Follow, Post, User
+
+DIGEST_SUBJECT = 'Новые записи авторов, на которых вы подписаны'
+# окно первой рассылки, когда предыдущих запусков не было
+FIRST_WINDOW = timedelta(days=1)
+
+
+def send_digests(now=None, chunk_size=None):
+    """Рассылает подписчикам по одному письму с новыми постами авторов.
+
+    В письмо попадают посты, опубликованные после предыдущего запуска.
+    Подписки читаются из Follow порциями по chunk_size подписчиков,
+    письма каждой порции отправляются через одно соединение.
+    Возвращает число отправленных писем.
+    """
+    now = timezone.now() if now is None else now
+    chunk_size = chunk_size or settings.DIGEST_CHUNK_SIZE
+    last_run = DigestRun.objects.first()
+    window_start = last_run.window_end if last_run else now - FIRST_WINDOW
+
+    authors = new_posts_by_author(window_start, now)
+    sent = 0
+    if authors:
+        follows = Follow.objects.filter(
+            author_id__in=authors,
+        ).order_by('user_id').values_list('user_id', 'author_id').iterator(
+            chunk_size=chunk_size
+        )
+        batch = []
+        for user_id, rows in groupby(follows, key=lambda row: row[0]):
+            batch.append((user_id, [author_id for _, author_id in rows]))
+            if len(batch) >= chunk_size:
+                sent += send_batch(batch, authors)
+                batch = []
+        if batch:
+            sent += send_batch(batch, authors)
+
+    DigestRun.objects.create(window_end=now, emails=sent)
+    return sent
+
+
+def new_posts_by_author(window_start, window_end):
+    """{id автора: {'username': ..., 'posts': [...]}} за окно."""
+    posts = Post.objects.filter(
+        pub_date__gt=window_start,
+        pub_date__lte=window_end,
+    ).order_by('author_id', '-pub_date').values(
+        'id', 'excerpt', 'author_id', 'author__username',
+    )
+    authors = {}
+    for author_id, author_posts in groupby(
+        posts.iterator(), key=lambda post: post['author_id']
+    ):
+        author_posts = list(author_posts)
+        authors[author_id] = {
+            'username': author_posts[0]['author__username'],
+            'posts': author_posts[:settings.DIGEST_POSTS_PER_AUTHOR],
+        }
+    return authors
+
+
+def send_batch(batch, authors):
+    users = {
+        pk: (username, email)
+        for pk, username, email in User.objects.filter(
+            pk__in=[user_id for user_id, _ in batch],
+        ).exclude(email='').values_list('pk', 'username', 'email')
+    }
+    messages = [
+        EmailMessage(
+            DIGEST_SUBJECT,
+            render_to_string('posts/email/digest.txt', {
+                'username': users[user_id][0],
+                'authors': [authors[author_id] for author_id in author_ids],
+                'site_url': settings.SITE_URL,
+            }),
+            to=[users[user_id][1]],
+        )
+        for user_id, author_ids in batch
+        if user_id in users
+    ]
+    if not messages:
+        return 0
+    with get_connection() as connection:
+        return connection.send_messages(messages) or 0
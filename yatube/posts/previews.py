@@ -0,0 +1,169 @@
+import hashlib
+import ipaddress
+import re
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+from urllib.request import HTTPRedirectHandler, Request, build_opener
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import LinkPreview
+
+URL_RE = re.compile(r'https?://[^\s<>"\']+')
+TRAILING_PUNCTUATION = '.,:;!?)]}'
+MAX_LINKS_PER_POST: int = 3
+FETCH_TIMEOUT: int = 5
+MAX_PAGE_SIZE: int = 512 * 1024
+USER_AGENT = 'YatubeLinkPreview/1.0'
+
+# один поток: карточки не загружаются дважды параллельно
+_executor = ThreadPoolExecutor(max_workers=1)
+
+
+def extract_urls(text):
+    """Первые MAX_LINKS_PER_POST различных http(s)-адресов из текста."""
+    urls = []
+    for match in URL_RE.finditer(text):
+        url = match.group().rstrip(TRAILING_PUNCTUATION)
+        if url not in urls:
+            urls.append(url)
+        if len(urls) == MAX_LINKS_PER_POST:
+            break
+    return urls
+
+
+def url_hash(url):
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def sync_post_links(post):
+    """Связывает пост с карточками его ссылок и ставит новые в загрузку."""
+    hashes = {url_hash(url): url for url in extract_urls(post.text)}
+    existing = set(
+        LinkPreview.objects.filter(url_hash__in=hashes).values_list(
+            'url_hash', flat=True
+        )
+    )
+    new = [
+        LinkPreview(url_hash=digest, url=url)
+        for digest, url in hashes.items()
+        if digest not in existing
+    ]
+    if new:
+        LinkPreview.objects.bulk_create(new, ignore_conflicts=True)
+    post.links.set(LinkPreview.objects.filter(url_hash__in=hashes))
+    if new and settings.LINK_PREVIEWS_BACKGROUND:
+        transaction.on_commit(lambda: _executor.submit(fetch_in_background))
+
+
+def fetch_pending(limit=None):
+    """Загружает метаданные карточек в состоянии PENDING.
+
+    Вызывается фоновым потоком после сохранения поста и командой
+    fetch_link_previews. Возвращает число обработанных карточек.
+    """
+    fetcher = import_string(settings.LINK_PREVIEW_FETCHER)
+    previews = LinkPreview.objects.filter(status=LinkPreview.PENDING)
+    done = 0
+    for preview in previews.order_by('pk')[:limit]:
+        try:
+            metadata = fetcher(preview.url)
+        except Exception:
+            metadata = None
+        if metadata:
+            preview.title = metadata.get('title', '')[:300]
+            preview.description = metadata.get('description', '')
+            preview.image_url = metadata.get('image', '')
+            preview.site_name = metadata.get('site_name', '')[:200]
+            preview.status = LinkPreview.READY
+        else:
+            preview.status = LinkPreview.FAILED
+        preview.fetched = timezone.now()
+        preview.save()
+        done += 1
+    return done
+
+
+def fetch_in_background():
+    try:
+        fetch_pending()
+    finally:
+        connections.close_all()
+
+
+class MetadataParser(HTMLParser):
+    """Собирает <title> и meta-теги Open Graph из HTML."""
+
+    def __init__(self):
+        super().__init__()
+        self.metadata = {}
+        self.in_title = False
+        self.title = ''
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'title':
+            self.in_title = True
+        elif tag == 'meta':
+            name = attrs.get('property') or attrs.get('name') or ''
+            content = attrs.get('content')
+            if content and name.startswith('og:'):
+                self.metadata.setdefault(name[3:], content)
+            elif content and name == 'description':
+                self.metadata.setdefault('description', content)
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self.in_title = False
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title += data
+
+
+def is_public_host(host):
+    """Не даёт загрузчику ходить во внутреннюю сеть (SSRF)."""
+    try:
+        addresses = socket.getaddrinfo(host, None)
+    except (socket.gaierror, UnicodeError):
+        return False
+    return all(
+        ipaddress.ip_address(address[4][0]).is_global
+        for address in addresses
+    )
+
+
+class PublicRedirectHandler(HTTPRedirectHandler):
+    """Не идёт по перенаправлениям во внутреннюю сеть."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        if not is_public_host(urlsplit(newurl).hostname or ''):
+            return None
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+def fetch_metadata(url):
+    """Загружает страницу и возвращает её заголовок, описание, картинку."""
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        return None
+    if not is_public_host(parts.hostname):
+        return None
+    request = Request(url, headers={'User-Agent': USER_AGENT})
+    opener = build_opener(PublicRedirectHandler)
+    with opener.open(request, timeout=FETCH_TIMEOUT) as response:
+        if response.headers.get_content_type() != 'text/html':
+            return None
+        charset = response.headers.get_content_charset() or 'utf-8'
+        html = response.read(MAX_PAGE_SIZE).decode(charset, 'replace')
+    parser = MetadataParser()
+    parser.feed(html)
+    metadata = parser.metadata
+    metadata.setdefault('title', parser.title.strip())
+    metadata.setdefault('site_name', parts.hostname)
+    return metadata
@@ -0,0 +1,72 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.template.loader import render_to_string
+
+from core import pubsub
+from core.cache import invalidate_public_pages
+
+from . import trending
+from .delta import forget_latest_post
+from .previews import sync_post_links
+from .tags import index_post
+from .models import Comment, Follow, Post
+
+# канал core.pubsub с новыми постами для follow_events
+POSTS_CHANNEL = 'posts'
+
+
+def comments_channel(post_id):
+    return f'post:{post_id}'
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    """Новый или изменённый пост сбрасывает гостевой кэш его лент
+    и обновляет карточки ссылок, хэштеги и упоминания, новый ещё
+    и уходит подписчикам follow_events.
+
+    Удаление кэш не сбрасывает: удалённый пост пропадёт из лент
+    по истечении срока кэширования.
+    """
+    scopes = ['index_page', f'profile:{instance.author.username}']
+    if instance.group_id is not None:
+        scopes.append(f'group:{instance.group.slug}')
+    invalidate_public_pages(*scopes)
+    if not kwargs.get('raw'):
+        sync_post_links(instance)
+        index_post(instance)
+    if created:
+        forget_latest_post()
+        pubsub.publish(POSTS_CHANNEL, {
+            'author_id': instance.author_id,
+            'html': render_to_string(
+                'includes/follow_post.html', {'post': instance}
+            ),
+        })
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    """Комментарий поднимает пост в популярном и уходит подписчикам
+    post_events.
+
+    При raw-вставке (loaddata, comment_queue.flush) рейтинг не
+    обновляется: вставивший пачку учитывает её сам.
+    """
+    if created and instance.post_id is not None:
+        if not kwargs.get('raw'):
+            trending.record_activity(
+                instance.post_id, trending.COMMENT_WEIGHT
+            )
+        pubsub.publish(comments_channel(instance.post_id), {
+            'html': render_to_string(
+                'includes/comment.html', {'comment': instance}
+            ),
+        })
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    """Новая подписка поднимает последний пост автора в популярном."""
+    if created:
+        trending.record_follow(instance.author_id)
@@ -0,0 +1,90 @@
+import re
+from collections import defaultdict
+
+from django.db.models import Q
+
+from .models import Post, Tag, User
+
+TAG_RE = re.compile(r'(?<![\w&#])#(\w+)')
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.+-]+)')
+TAG_MAX_LENGTH: int = Tag._meta.get_field('name').max_length
+
+
+def extract_tags(text):
+    """Хэштеги из текста в нижнем регистре, без повторов."""
+    return {
+        name.lower() for name in TAG_RE.findall(text)
+        if len(name) <= TAG_MAX_LENGTH
+    }
+
+
+def extract_mentions(text):
+    """Имена пользователей после @, без завершающей точки."""
+    return {name.rstrip('.') for name in MENTION_RE.findall(text)} - {''}
+
+
+def index_post(post):
+    """Обновляет хэштеги и упоминания одного поста."""
+    index_posts([(post.pk, post.text)])
+
+
+def index_posts(rows):
+    """Обновляет хэштеги и упоминания постов по парам (pk, text).
+
+    На всю порцию — по одному запросу на чтение справочников и связей
+    и по одному на добавление и удаление связей; строки, которые
+    не изменились, не трогаются.
+    """
+    tags = {pk: extract_tags(text) for pk, text in rows}
+    mentions = {pk: extract_mentions(text) for pk, text in rows}
+
+    names = set().union(*tags.values())
+    if names:
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in names], ignore_conflicts=True
+        )
+    tag_ids = dict(
+        Tag.objects.filter(name__in=names).values_list('name', 'pk')
+    )
+    usernames = set().union(*mentions.values())
+    user_ids = dict(
+        User.objects.filter(username__in=usernames).values_list(
+            'username', 'pk'
+        )
+    ) if usernames else {}
+
+    sync_relation(Post.tags, {
+        pk: {tag_ids[name] for name in post_tags}
+        for pk, post_tags in tags.items()
+    })
+    sync_relation(Post.mentions, {
+        pk: {user_ids[name] for name in names if name in user_ids}
+        for pk, names in mentions.items()
+    })
+
+
+def sync_relation(descriptor, wanted):
+    """Приводит связи ManyToMany постов к wanted: {pk поста: {pk цели}}."""
+    field = descriptor.field
+    through = descriptor.through
+    source = field.m2m_column_name()
+    target = field.m2m_reverse_name()
+
+    current = defaultdict(set)
+    for post_id, target_id in through.objects.filter(
+        **{f'{source}__in': wanted}
+    ).values_list(source, target):
+        current[post_id].add(target_id)
+
+    stale = Q()
+    for post_id, targets in current.items():
+        removed = targets - wanted[post_id]
+        if removed:
+            stale |= Q(**{source: post_id, f'{target}__in': removed})
+    if stale:
+        through.objects.filter(stale).delete()
+    through.objects.bulk_create([
+        through(**{source: post_id, target: target_id})
+        for post_id, targets in wanted.items()
+        for target_id in targets - current[post_id]
+    ])
@@ -0,0 +1,245 @@
+from unittest import mock
+
+from django.contrib.admin import ACTION_CHECKBOX_NAME
+from django.contrib.auth.models import Permission
+from django.db import connection, models
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import bulk
+
+from ..models import Comment, Follow, Group, Post, PostActivity, User
+
+
+class PostAdminActionsTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass',
+        )
+        cls.admin_client = Client()
+        cls.admin_client.force_login(cls.admin)
+
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            description='Тестовое описание',
+            slug='group-slug',
+        )
+        cls.changelist = reverse('admin:posts_post_changelist')
+
+    def setUp(self) -> None:
+        self.posts = [
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+            for i in range(5)
+        ]
+        self.other_post = Post.objects.create(
+            author=self.other, text='Чужой пост'
+        )
+        # комментарий заодно создаёт PostActivity (posts.signals)
+        Comment.objects.create(
+            post=self.posts[0], author=self.other, text='Комментарий'
+        )
+
+    def run_action(self, action, posts, client=None, **data):
+        client = client or self.admin_client
+        return client.post(self.changelist, {
+            'action': action,
+            ACTION_CHECKBOX_NAME: [post.pk for post in posts],
+            **data,
+        })
+
+    def test_reassign_group_in_chunks(self):
+        """Группа меняется через UPDATE, без загрузки объектов."""
+        with mock.patch.object(Post, '__init__') as post_init:
+            self.run_action(
+                'reassign_group', self.posts, group=self.group.pk
+            )
+
+        post_init.assert_not_called()
+        self.assertEqual(self.group.posts.count(), len(self.posts))
+        self.assertIsNone(Post.objects.get(pk=self.other_post.pk).group)
+
+    def test_delete_by_author_asks_confirmation(self):
+        """Без подтверждения ничего не удаляется."""
+        response = self.run_action('delete_by_author', self.posts[:1])
+
+        self.assertTemplateUsed(
+            response, 'admin/delete_by_author_confirmation.html'
+        )
+        self.assertEqual(response.context['total'], len(self.posts))
+        self.assertEqual(Post.objects.count(), len(self.posts) + 1)
+
+    def test_delete_by_author_cascades(self):
+        """Удаляются все посты автора вместе с зависимыми строками,
+        гостевой кэш их лент сбрасывается."""
+        self.group.posts.add(self.posts[1], bulk=False)
+        with mock.patch('posts.admin.invalidate_public_pages') as invalidate:
+            self.run_action('delete_by_author', self.posts[:1], post='yes')
+
+        self.assertCountEqual(
+            invalidate.call_args[0],
+            ['index_page', 'profile:author', 'group:group-slug'],
+        )
+        self.assertFalse(Post.objects.filter(author=self.author).exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(PostActivity.objects.exists())
+        self.assertTrue(Post.objects.filter(pk=self.other_post.pk).exists())
+
+    def test_delete_by_author_select_across(self):
+        """При выборе всех строк подтверждение не перечисляет их pk."""
+        response = self.run_action(
+            'delete_by_author', self.posts[:1], select_across='1'
+        )
+
+        self.assertContains(response, 'name="select_across" value="1"')
+        self.assertNotContains(response, f'name="{ACTION_CHECKBOX_NAME}"')
+
+        self.run_action(
+            'delete_by_author', self.posts[:1], select_across='1', post='yes'
+        )
+
+        self.assertFalse(Post.objects.exists())
+
+    def test_actions_require_permissions(self):
+        """Сотруднику с правом только на просмотр действия недоступны."""
+        viewer = User.objects.create_user(username='viewer', is_staff=True)
+        viewer.user_permissions.add(
+            Permission.objects.get(codename='view_post')
+        )
+        client = Client()
+        client.force_login(viewer)
+
+        response = client.get(self.changelist)
+        self.run_action(
+            'delete_by_author', self.posts[:1], client=client, post='yes'
+        )
+        self.run_action(
+            'reassign_group', self.posts, client=client, group=self.group.pk
+        )
+
+        actions = dict(
+            response.context['action_form'].fields['action'].choices
+        )
+        self.assertNotIn('delete_by_author', actions)
+        self.assertNotIn('reassign_group', actions)
+        self.assertIn('export_selected', actions)
+        self.assertEqual(Post.objects.count(), len(self.posts) + 1)
+        self.assertFalse(self.group.posts.exists())
+
+    def test_export_selected_streams_csv(self):
+        """Выгрузка отдаётся потоком CSV."""
+        response = self.run_action('export_selected', self.posts)
+        content = b''.join(response.streaming_content).decode()
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(len(content.splitlines()), len(self.posts) + 1)
+        self.assertNotIn(self.other_post.text, content)
+
+
+class BulkHelpersTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Пост {i}') for i in range(7)
+        )
+
+    def test_iter_pk_chunks(self):
+        """Ключи отдаются порциями не больше chunk_size, без повторов."""
+        chunks = list(bulk.iter_pk_chunks(Post.objects.all(), chunk_size=3))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 1])
+        self.assertEqual(
+            sorted(sum(chunks, [])),
+            sorted(Post.objects.values_list('pk', flat=True)),
+        )
+
+    def test_bulk_delete_rejects_unsupported_on_delete(self):
+        """Неподдерживаемый on_delete обнаруживается до удаления."""
+        relation = Comment._meta.get_field('post').remote_field
+        with mock.patch.object(relation, 'on_delete', models.PROTECT):
+            with self.assertRaises(NotImplementedError):
+                bulk.bulk_delete(Post.objects.all(), chunk_size=3)
+
+        self.assertEqual(Post.objects.count(), 7)
+
+    def test_bulk_delete_reports_progress(self):
+        """bulk_delete сообщает о ходе после каждой порции."""
+        progress = mock.Mock()
+        deleted = bulk.bulk_delete(
+            Post.objects.all(), chunk_size=3, progress=progress
+        )
+
+        self.assertEqual(deleted, 7)
+        self.assertEqual(
+            [args[0] for args, _ in progress.call_args_list], [3, 6, 7]
+        )
+
+
+class ChangelistQueriesTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass',
+        )
+        cls.admin_client = Client()
+        cls.admin_client.force_login(cls.admin)
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {i}', description='-', slug=f'group-{i}'
+            )
+            for i in range(3)
+        ]
+
+    def add_rows(self, count):
+        for i in range(count):
+            author = User.objects.create_user(
+                username=f'user-{User.objects.count()}'
+            )
+            post = Post.objects.create(
+                author=author, text='Пост', group=self.groups[i % 3]
+            )
+            Comment.objects.create(post=post, author=author, text='Текст')
+            Follow.objects.create(user=author, author=self.admin)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.admin_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        """Число запросов списка в админке не зависит от числа строк."""
+        for model in ('post', 'comment', 'follow'):
+            with self.subTest(model=model):
+                url = reverse(f'admin:posts_{model}_changelist')
+                self.add_rows(3)
+                few = self.count_queries(url)
+                self.add_rows(6)
+                many = self.count_queries(url)
+
+                self.assertEqual(few, many)
+
+    def test_search_by_author_username(self):
+        """Поиск ищет по имени автора."""
+        self.add_rows(2)
+        for model in ('post', 'comment', 'follow'):
+            with self.subTest(model=model):
+                response = self.admin_client.get(
+                    reverse(f'admin:posts_{model}_changelist'),
+                    {'q': 'user-1'},
+                )
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['cl'].result_count, 1)
@@ -0,0 +1,98 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import ArchivedComment, ArchivedPost, Comment, Post, User
+from ..views import POSTS_ON_PAGE
+
+OLD_POSTS: int = 3
+
+
+class ArchivePostsTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.guest_client = Client()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self) -> None:
+        self.old_posts = [
+            Post.objects.create(author=self.user, text=f'Старый пост {i}')
+            for i in range(OLD_POSTS)
+        ]
+        self.comment = Comment.objects.create(
+            post=self.old_posts[0], author=self.user, text='Комментарий',
+        )
+        Post.objects.filter(
+            pk__in=[post.pk for post in self.old_posts]
+        ).update(pub_date=timezone.now() - timedelta(days=400))
+        self.new_posts = [
+            Post.objects.create(author=self.user, text=f'Новый пост {i}')
+            for i in range(POSTS_ON_PAGE)
+        ]
+
+    def archive(self, **options):
+        out = io.StringIO()
+        call_command('archive_posts', days=365, stdout=out, **options)
+        return out.getvalue()
+
+    def test_old_posts_moved_in_batches(self):
+        """Старые посты и комментарии переносятся порциями."""
+        output = self.archive(batch_size=2)
+
+        self.assertIn('Перенесено постов: 2, комментариев: 1', output)
+        self.assertIn('Готово: постов 3, комментариев 1', output)
+        self.assertEqual(Post.objects.count(), POSTS_ON_PAGE)
+        self.assertEqual(ArchivedPost.objects.count(), OLD_POSTS)
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(
+            ArchivedComment.objects.get().post_id, self.old_posts[0].pk
+        )
+
+    def test_max_batches(self):
+        """--max-batches ограничивает объём работы за один запуск."""
+        self.archive(batch_size=1, max_batches=2)
+
+        self.assertEqual(ArchivedPost.objects.count(), 2)
+        self.archive(batch_size=1)
+        self.assertEqual(ArchivedPost.objects.count(), OLD_POSTS)
+
+    def test_archived_post_detail(self):
+        """Архивный пост открывается по старой ссылке."""
+        self.archive()
+        post = self.old_posts[0]
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['archived'])
+        self.assertEqual(response.context['post'].text, post.text)
+        self.assertEqual(
+            response.context['post_count'], OLD_POSTS + POSTS_ON_PAGE
+        )
+        self.assertContains(response, self.comment.text)
+
+    def test_profile_continues_with_archive(self):
+        """Профиль после новых постов показывает архивные."""
+        self.archive()
+        response = self.guest_client.get(
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            {'page': 2},
+        )
+        page_obj = response.context['page_obj']
+
+        self.assertEqual(page_obj.paginator.count, OLD_POSTS + POSTS_ON_PAGE)
+        self.assertContains(
+            response, f'Всего постов: {OLD_POSTS + POSTS_ON_PAGE}'
+        )
+        self.assertCountEqual(
+            [post.text for post in page_obj],
+            [post.text for post in self.old_posts],
+        )
@@ -0,0 +1,125 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import comment_queue, trending
+from ..models import Comment, Post, PostActivity, User
+from ..trending import COMMENT_WEIGHT
+
+TEMP_QUEUE_DIR = tempfile.mkdtemp()
+
+
+@override_settings(
+    COMMENTS_WRITE_BEHIND=True,
+    COMMENT_QUEUE_PATH=os.path.join(TEMP_QUEUE_DIR, 'queue.sqlite3'),
+)
+class WriteBehindCommentsTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_QUEUE_DIR, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.addCleanup(call_command, 'flush_comments', stdout=io.StringIO())
+        self.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+        self.author_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Отложенный комментарий'},
+        )
+
+    def test_comment_queued_and_visible_to_author(self):
+        """Комментарий не пишется в базу, но автор сразу его видит."""
+        self.assertFalse(Comment.objects.exists())
+        self.assertContains(
+            self.author_client.get(self.detail_url), 'Отложенный комментарий'
+        )
+        self.assertNotContains(
+            self.reader_client.get(self.detail_url), 'Отложенный комментарий'
+        )
+
+    def test_flush_writes_comments_in_batches(self):
+        """flush_comments переносит очередь в базу и обновляет популярное."""
+        for i in range(4):
+            self.author_client.post(
+                reverse(
+                    'posts:add_comment', kwargs={'post_id': self.post.pk}
+                ),
+                {'text': f'Комментарий {i}'},
+            )
+        out = io.StringIO()
+        with mock.patch(
+            'posts.comment_queue.trending.record_activities',
+            wraps=trending.record_activities,
+        ) as record_activities:
+            call_command('flush_comments', batch_size=2, stdout=out)
+
+        self.assertIn('Записано комментариев: 5', out.getvalue())
+        self.assertEqual(self.post.comments.count(), 5)
+        # по одному обновлению рейтинга на порцию, а не на комментарий
+        self.assertEqual(record_activities.call_count, 3)
+        self.assertAlmostEqual(
+            PostActivity.objects.get(post=self.post).score,
+            5 * COMMENT_WEIGHT,
+            places=3,
+        )
+        self.assertContains(
+            self.reader_client.get(self.detail_url), 'Комментарий 3'
+        )
+        response = self.author_client.get(self.detail_url)
+        self.assertEqual(len(response.context['comments']), 5)
+
+    def test_flush_keeps_queued_time_and_order(self):
+        """В базу попадает время постановки в очередь, а не записи."""
+        first = timezone.now() - timedelta(hours=2)
+        comment_queue.enqueue(self.post.pk, self.reader.pk, 'Ранний', first)
+
+        call_command('flush_comments', stdout=io.StringIO())
+
+        self.assertEqual(self.post.comments.get(text='Ранний').created, first)
+        self.assertEqual(
+            list(self.post.comments.values_list('text', flat=True)),
+            ['Отложенный комментарий', 'Ранний'],
+        )
+
+    def test_orphans_do_not_block_queue(self):
+        """Комментарий к удалённому посту не мешает записи остальных."""
+        doomed = Post.objects.create(author=self.author, text='Удалим')
+        comment_queue.enqueue(doomed.pk, self.reader.pk, 'Сирота')
+        comment_queue.enqueue(self.post.pk, self.reader.pk, 'После сироты')
+        doomed.delete()
+
+        with self.assertLogs('posts.comment_queue', 'WARNING'):
+            call_command('flush_comments', batch_size=2, stdout=io.StringIO())
+
+        self.assertCountEqual(
+            self.post.comments.values_list('text', flat=True),
+            ['Отложенный комментарий', 'После сироты'],
+        )
+        self.assertFalse(Comment.objects.filter(text='Сирота').exists())
+        self.assertEqual(comment_queue.flush(), 0)
@@ -2,12 +2,14 @@ import shutil
 import tempfile
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from ..models import Group, Post, User, Comment
 from ..forms import PostForm
+from ..views import COMMENT_RATE
 
 
 TEST_GIF = (
@@ -187,3 +189,34 @@ class PostFormCreateEditTests(TestCase):
             comment_count_before,
             comment_count_after
         )
+
+
+class CommentRateLimitTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='spammer')
+        cls.auth_client = Client()
+        cls.auth_client.force_login(cls.user)
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+
+    def setUp(self) -> None:
+        cache.clear()
+        # пользователь с тем же id в следующих тестах не должен
+        # получить израсходованный лимит
+        self.addCleanup(cache.clear)
+
+    def test_comment_storm_throttled(self):
+        """Комментарии сверх лимита отклоняются с 429."""
+        limit = int(COMMENT_RATE.split('/')[0])
+        url = reverse('posts:add_comment', args=[self.post.id])
+        for i in range(limit):
+            self.auth_client.post(url, {'text': f'Комментарий {i}'})
+
+        response = self.auth_client.post(url, {'text': 'Лишний'})
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(Comment.objects.count(), limit)
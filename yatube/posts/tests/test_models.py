@@ -1,6 +1,11 @@
-from django.test import TestCase
+import io
+from unittest import mock, skipIf
 from uuid import uuid4
 
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..markup import markdown, sanitize
 from ..models import Group, Post, User, POST_STR_DESC
 
 
@@ -25,3 +30,89 @@ class PostModelTest(TestCase):
         post = PostModelTest.post
         expected_object_name = post.text
         self.assertEqual(expected_object_name, str(post))
+
+
+class PostRenderTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @mock.patch('posts.markup.markdown', None)
+    def test_save_renders_escaped_html(self):
+        """Без Markdown текст экранируется и разбивается на абзацы."""
+        post = Post.objects.create(
+            author=self.user,
+            text='Первый <script>alert(1)</script>\n\nВторой &   третий',
+        )
+
+        self.assertNotIn('<script>', post.rendered_html)
+        self.assertIn('&lt;script&gt;', post.rendered_html)
+        self.assertEqual(post.rendered_html.count('<p>'), 2)
+        self.assertEqual(
+            post.excerpt, 'Первый <script>alert(1)</script> Второй & третий'
+        )
+
+    @skipIf(markdown is None, 'Markdown не установлен')
+    def test_save_renders_markdown(self):
+        """При сохранении текст размечается Markdown и очищается."""
+        post = Post.objects.create(
+            author=self.user,
+            text=(
+                '# Заголовок\n\n**жирный** и [ссылка](https://example.com/)'
+                '\n\n<script>alert(1)</script>'
+            ),
+        )
+
+        self.assertEqual(
+            post.rendered_html,
+            '<h1>Заголовок</h1>\n<p><strong>жирный</strong> и '
+            '<a href="https://example.com/" rel="nofollow noopener">ссылка</a>'
+            '</p>\n',
+        )
+        self.assertEqual(post.excerpt, 'Заголовок жирный и ссылка')
+
+    @skipIf(markdown is None, 'Markdown не установлен')
+    def test_hashtag_at_line_start_is_not_heading(self):
+        """Хэштег в начале строки остаётся текстом, а не заголовком."""
+        post = Post.objects.create(
+            author=self.user, text='#django rocks\n#python',
+        )
+
+        self.assertEqual(
+            post.rendered_html, '<p>#django rocks\n#python</p>'
+        )
+        self.assertEqual(
+            set(post.tags.values_list('name', flat=True)),
+            {'django', 'python'},
+        )
+
+    def test_sanitize(self):
+        """Из HTML Markdown убираются скрипты и опасные ссылки."""
+        html = sanitize(
+            '<p onclick="x()">Текст <a href="javascript:alert(1)">раз</a> '
+            '<a href="https://example.com/">два</a>'
+            '<script>alert(1)</script><img src="x"></p>'
+        )
+
+        self.assertEqual(
+            html,
+            '<p>Текст <a rel="nofollow noopener">раз</a> '
+            '<a href="https://example.com/" rel="nofollow noopener">два</a>'
+            '</p>',
+        )
+
+    def test_render_posts_command(self):
+        """Команда заполняет поля постов, созданных без save()."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Пост {i}') for i in range(3)
+        )
+
+        call_command('render_posts', batch_size=2, stdout=io.StringIO())
+
+        self.assertEqual(
+            sorted(Post.objects.values_list('excerpt', flat=True)),
+            ['Пост 0', 'Пост 1', 'Пост 2'],
+        )
+        self.assertFalse(Post.objects.filter(rendered_html='').exists())
@@ -0,0 +1,87 @@
+import io
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import DigestRun, Follow, Post, User
+from ..notifications import send_digests
+
+
+class DigestTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='author')
+        cls.other_author = User.objects.create_user(username='other')
+        cls.followers = [
+            User.objects.create_user(
+                username=f'follower{i}', email=f'follower{i}@example.com'
+            )
+            for i in range(5)
+        ]
+        cls.no_email = User.objects.create_user(username='no_email')
+        for follower in cls.followers + [cls.no_email]:
+            Follow.objects.create(user=follower, author=cls.author)
+        Follow.objects.create(
+            user=cls.followers[0], author=cls.other_author
+        )
+
+    def test_one_digest_per_follower(self):
+        """Каждый подписчик с почтой получает одно письмо на окно."""
+        Post.objects.create(author=self.author, text='Первый пост')
+        Post.objects.create(author=self.author, text='Второй пост')
+        Post.objects.create(author=self.other_author, text='Чужой пост')
+
+        sent = send_digests(chunk_size=2)
+
+        self.assertEqual(sent, len(self.followers))
+        self.assertEqual(len(mail.outbox), len(self.followers))
+        first = next(
+            message for message in mail.outbox
+            if message.to == [self.followers[0].email]
+        )
+        self.assertIn('Второй пост', first.body)
+        self.assertIn('Чужой пост', first.body)
+        self.assertNotIn('Чужой пост', mail.outbox[-1].body)
+
+    def test_one_connection_per_chunk(self):
+        """Письма порции отправляются через одно соединение."""
+        Post.objects.create(author=self.author, text='Пост')
+        with mock.patch(
+            'posts.notifications.get_connection',
+            wraps=mail.get_connection,
+        ) as get_connection:
+            send_digests(chunk_size=2)
+
+        # 6 подписчиков порциями по 2
+        self.assertEqual(get_connection.call_count, 3)
+
+    def test_next_window_starts_after_previous_run(self):
+        """Посты прошлого окна повторно не рассылаются."""
+        Post.objects.create(author=self.author, text='Старый пост')
+        send_digests()
+        mail.outbox.clear()
+
+        self.assertEqual(send_digests(), 0)
+        Post.objects.create(author=self.author, text='Новый пост')
+        send_digests(now=timezone.now() + timedelta(seconds=1))
+
+        self.assertEqual(len(mail.outbox), len(self.followers))
+        self.assertNotIn('Старый пост', mail.outbox[0].body)
+        self.assertEqual(DigestRun.objects.count(), 3)
+
+    def test_command(self):
+        """Команда send_digests сообщает число писем."""
+        Post.objects.create(author=self.author, text='Пост')
+        out = io.StringIO()
+        call_command('send_digests', stdout=out)
+
+        self.assertIn(
+            f'Отправлено писем: {len(self.followers)}', out.getvalue()
+        )
@@ -0,0 +1,126 @@
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Group, LinkPreview, Post, User
+from ..previews import MAX_LINKS_PER_POST, MetadataParser, extract_urls
+
+FETCHED_URLS = []
+
+
+def stub_fetcher(url):
+    """Загрузчик для тестов: без сети, по адресу возвращает метаданные."""
+    FETCHED_URLS.append(url)
+    if 'broken' in url:
+        raise OSError('connection refused')
+    return {
+        'title': f'Заголовок {url}',
+        'description': 'Описание страницы',
+        'site_name': 'example.com',
+    }
+
+
+@override_settings(
+    LINK_PREVIEW_FETCHER='posts.tests.test_previews.stub_fetcher',
+    LINK_PREVIEWS_BACKGROUND=False,
+)
+class LinkPreviewTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.guest_client = Client()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            description='Тестовое описание',
+            slug='group-slug',
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        FETCHED_URLS.clear()
+
+    def fetch(self):
+        call_command('fetch_link_previews', stdout=io.StringIO())
+
+    def test_extract_urls(self):
+        """Адреса извлекаются без завершающей пунктуации и с ограничением."""
+        text = (
+            'Смотрите https://example.com/a, и (https://example.com/b). '
+            + ' '.join(f'http://example.com/{i}' for i in range(10))
+        )
+
+        urls = extract_urls(text)
+
+        self.assertEqual(urls[:2], [
+            'https://example.com/a', 'https://example.com/b',
+        ])
+        self.assertEqual(len(urls), MAX_LINKS_PER_POST)
+
+    def test_one_preview_per_url(self):
+        """Одинаковые ссылки в разных постах делят одну карточку."""
+        for i in range(2):
+            Post.objects.create(
+                author=self.user, text=f'Пост {i}: https://example.com/page'
+            )
+        self.fetch()
+
+        preview = LinkPreview.objects.get()
+        self.assertEqual(preview.posts.count(), 2)
+        self.assertEqual(preview.status, LinkPreview.READY)
+        self.assertEqual(FETCHED_URLS, ['https://example.com/page'])
+
+    def test_pages_render_ready_previews_without_fetching(self):
+        """Карточки показываются на страницах без загрузки при рендере."""
+        # главная показывает только посты с группой
+        post = Post.objects.create(
+            author=self.user,
+            text='Читайте https://example.com/news',
+            group=self.group,
+        )
+        Post.objects.create(
+            author=self.user, text='Сломано https://broken.example.com/'
+        )
+        self.fetch()
+        FETCHED_URLS.clear()
+
+        for address in (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+        ):
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+
+                self.assertContains(
+                    response, 'Заголовок https://example.com/news'
+                )
+                self.assertNotContains(response, 'Заголовок https://broken')
+        self.assertEqual(FETCHED_URLS, [])
+        self.assertEqual(
+            LinkPreview.objects.get(url__contains='broken').status,
+            LinkPreview.FAILED,
+        )
+
+    def test_metadata_parser(self):
+        """Из HTML берутся теги Open Graph, а без них — <title>."""
+        parser = MetadataParser()
+        parser.feed(
+            '<html><head><title>Запасной</title>'
+            '<meta property="og:title" content="Заголовок">'
+            '<meta name="description" content="Описание">'
+            '<meta property="og:image" content="https://example.com/i.png">'
+            '</head></html>'
+        )
+
+        self.assertEqual(parser.metadata, {
+            'title': 'Заголовок',
+            'description': 'Описание',
+            'image': 'https://example.com/i.png',
+        })
+        self.assertEqual(parser.title, 'Запасной')
@@ -0,0 +1,93 @@
+import io
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, Tag, User
+from ..tags import extract_mentions, extract_tags
+from ..views import POSTS_ON_PAGE
+
+
+class TagTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.guest_client = Client()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def test_extract(self):
+        """Хэштеги приводятся к нижнему регистру, упоминания — без точки."""
+        text = 'Про #Django и #django, &#39; @reader. и почта a@b.ru'
+
+        self.assertEqual(extract_tags(text), {'django'})
+        self.assertEqual(extract_mentions(text), {'reader'})
+
+    def test_edit_reindexes_post(self):
+        """Правка поста добавляет новые хэштеги и снимает удалённые."""
+        post = Post.objects.create(
+            author=self.user, text='#python #django для @reader'
+        )
+        self.assertCountEqual(
+            post.tags.values_list('name', flat=True), ['python', 'django']
+        )
+        self.assertEqual(list(self.reader.mentioned_in.all()), [post])
+
+        post.text = '#python и #tests без упоминаний @nobody'
+        post.save()
+
+        self.assertCountEqual(
+            post.tags.values_list('name', flat=True), ['python', 'tests']
+        )
+        self.assertFalse(self.reader.mentioned_in.exists())
+        self.assertEqual(Tag.objects.filter(name='python').count(), 1)
+
+    def test_tag_feed_keyset_pages(self):
+        """Лента хэштега листается курсором без повторов и пропусков."""
+        posts = [
+            Post.objects.create(author=self.user, text=f'Пост {i} #Лента')
+            for i in range(POSTS_ON_PAGE + 3)
+        ]
+        Post.objects.create(author=self.user, text='Без хэштега')
+        address = reverse('posts:tag_posts', kwargs={'tag': 'лента'})
+
+        first = self.guest_client.get(address)
+        second = self.guest_client.get(
+            address, {'cursor': first.context['page'].next_cursor}
+        )
+
+        seen = list(first.context['page']) + list(second.context['page'])
+        self.assertEqual(seen, posts[::-1])
+        self.assertFalse(second.context['page'].has_next)
+        self.assertEqual(
+            self.guest_client.get(
+                reverse('posts:tag_posts', kwargs={'tag': 'нет'})
+            ).status_code,
+            404,
+        )
+
+    def test_mention_feed(self):
+        """На странице упоминаний только посты с @пользователем."""
+        post = Post.objects.create(author=self.user, text='Привет, @reader!')
+        Post.objects.create(author=self.user, text='Привет всем')
+
+        response = self.guest_client.get(
+            reverse('posts:mention_posts', kwargs={'username': 'reader'})
+        )
+
+        self.assertEqual(list(response.context['page']), [post])
+
+    def test_reindex_command(self):
+        """Команда восстанавливает индекс постов, созданных без сигналов."""
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'#старое {i} @reader')
+            for i in range(5)
+        ])
+
+        call_command('reindex_tags', batch_size=2, stdout=io.StringIO())
+
+        self.assertEqual(Tag.objects.get(name='старое').posts.count(), 5)
+        self.assertEqual(self.reader.mentioned_in.count(), 5)
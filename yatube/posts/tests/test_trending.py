@@ -0,0 +1,128 @@
+from datetime import timedelta
+
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import (Comment, Follow, Group, Post, PostActivity,
+                      TrendingEntry, User)
+from ..trending import (COMMENT_WEIGHT, FOLLOW_WEIGHT, HALF_LIFE,
+                        record_activity, refresh_trending)
+
+
+class TrendingTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.guest_client = Client()
+
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            description='Тестовое описание',
+            slug='group-slug',
+        )
+
+        cls.quiet_post = Post.objects.create(
+            author=cls.user,
+            text='Тихий пост',
+            group=cls.group,
+        )
+        cls.hot_post = Post.objects.create(
+            author=cls.author,
+            text='Обсуждаемый пост',
+            group=cls.group,
+        )
+        cls.old_post = Post.objects.create(
+            author=cls.user,
+            text='Старый пост',
+        )
+
+    def test_comment_and_follow_update_activity(self):
+        """Комментарии и подписки увеличивают рейтинг поста."""
+        Comment.objects.create(
+            post=self.hot_post, author=self.user, text='Комментарий',
+        )
+        Follow.objects.create(user=self.user, author=self.author)
+
+        activity = PostActivity.objects.get(post=self.hot_post)
+        self.assertAlmostEqual(
+            activity.score, COMMENT_WEIGHT + FOLLOW_WEIGHT, places=3,
+        )
+
+    def test_activity_decays(self):
+        """Старая активность весит меньше свежей."""
+        now = timezone.now()
+        record_activity(self.old_post.pk, 10, now - HALF_LIFE * 4)
+        record_activity(self.hot_post.pk, 2, now)
+
+        refresh_trending(now)
+
+        ranked = list(
+            TrendingEntry.objects.filter(
+                scope=TrendingEntry.POSTS,
+            ).values_list('post_id', flat=True)
+        )
+        self.assertEqual(ranked, [self.hot_post.pk, self.old_post.pk])
+
+    def test_refresh_builds_group_tops(self):
+        """Топ собирается глобально, по группам и для групп."""
+        now = timezone.now()
+        record_activity(self.hot_post.pk, 5, now)
+        record_activity(self.quiet_post.pk, 1, now)
+
+        refresh_trending(now)
+
+        group_posts = TrendingEntry.objects.filter(
+            scope=TrendingEntry.GROUP_POSTS, group=self.group,
+        )
+        self.assertEqual(
+            list(group_posts.values_list('post_id', flat=True)),
+            [self.hot_post.pk, self.quiet_post.pk],
+        )
+        self.assertTrue(
+            TrendingEntry.objects.filter(
+                scope=TrendingEntry.GROUPS, group=self.group, rank=1,
+            ).exists()
+        )
+
+    def test_refresh_drops_stale_activity(self):
+        """Активность за пределами окна удаляется и не попадает в топ."""
+        record_activity(
+            self.old_post.pk, 100, timezone.now() - timedelta(days=30),
+        )
+
+        refresh_trending()
+
+        self.assertFalse(PostActivity.objects.exists())
+        self.assertFalse(TrendingEntry.objects.exists())
+
+    def test_trending_page_uses_single_query(self):
+        """Страница популярного строится одним запросом."""
+        record_activity(self.hot_post.pk, 5)
+        refresh_trending()
+
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(reverse('posts:trending'))
+
+        self.assertEqual(response.context['posts'], [self.hot_post])
+        self.assertEqual(response.context['groups'], [self.group])
+
+    def test_trending_group_page(self):
+        """Популярное группы показывает её посты и 404 для чужого slug."""
+        record_activity(self.hot_post.pk, 5)
+        refresh_trending()
+
+        response = self.guest_client.get(
+            reverse('posts:trending_group', kwargs={'slug': self.group.slug})
+        )
+        missing = self.guest_client.get(
+            reverse('posts:trending_group', kwargs={'slug': 'missing'})
+        )
+
+        self.assertEqual(response.context['posts'], [self.hot_post])
+        self.assertEqual(missing.status_code, 404)
@@ -1,16 +1,25 @@
+import gzip
 import shutil
 import tempfile
+from http import HTTPStatus
+from importlib import import_module
 from typing import List
 
 from django import forms
+from django.apps import apps
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import Group, Post, User, Follow
-from ..views import POSTS_ON_PAGE
+from ..counters import flush_views
+from ..models import Comment, Follow, Group, Post, PostActivity, User
+from ..trending import FOLLOW_WEIGHT
+from ..views import (GROUPS_ON_PAGE, POSTS_ON_PAGE, PREVIEW_HTML_LENGTH,
+                     USERS_ON_PAGE, follow_authors)
 
 
 PAGINATOR_ADDITIONAL_PAGES: int = 3
@@ -27,6 +36,7 @@ TEST_GIF = (
 )
 
 
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostPagesTests(TestCase):
 
     @classmethod
@@ -94,6 +104,11 @@ class PostPagesTests(TestCase):
     def setUp(self) -> None:
         cache.clear()
 
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
     def test_pages_uses_correct_template(self):
         """URL-адрес использует соответствующий шаблон."""
         for template, reverse_name in self.templates_pages_names.items():
@@ -371,7 +386,143 @@ class CachedPostPagesTests(TestCase):
 
         self.assertNotEqual(cached_page, non_cached_page)
 
+    def test_anonymous_pages_are_publicly_cacheable(self):
+        """Гостевые ленты кэшируются и помечены для обратного прокси."""
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+        )
+        for address in pages:
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn('max-age=20', response['Cache-Control'])
+                self.assertIn('Cookie', response['Vary'])
+
+    def test_anonymous_cache_ignores_cookies(self):
+        """Гости с разными cookie получают одну закэшированную страницу."""
+        address = reverse('posts:profile', kwargs={'username': 'auth'})
+        cached_page = self.guest_client.get(address).content
+        Post.objects.all().delete()
+
+        other_guest = Client()
+        other_guest.cookies['tracking'] = 'other-guest'
+
+        self.assertEqual(other_guest.get(address).content, cached_page)
+
+    def test_new_post_invalidates_group_page(self):
+        """Новый пост группы сбрасывает гостевой кэш страницы группы."""
+        address = reverse(
+            'posts:group_list', kwargs={'slug': self.group.slug}
+        )
+        self.guest_client.get(address)
+
+        new_post = Post.objects.create(
+            text='Свежий пост',
+            author=self.user,
+            group=self.group,
+        )
+        response = self.guest_client.get(address)
+
+        self.assertEqual(response.context['page_obj'][0], new_post)
+
+    def test_authorized_pages_are_private(self):
+        """Вошедший пользователь не получает гостевой кэш."""
+        address = reverse('posts:index')
+        guest_page = self.guest_client.get(address).content
+
+        response = self.auth_client.get(address)
+
+        self.assertNotEqual(response.content, guest_page)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn(self.user.username, response.content.decode())
+
+
+@override_settings(STREAMING_FEEDS=True)
+class StreamingFeedTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.guest_client = Client()
+
+        cls.user = User.objects.create_user(username='auth')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            description='Тестовое описание',
+            slug='group-slug',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Потоковый пост',
+            group=cls.group,
+        )
+
+        cls.feed_pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user.username}),
+        )
+
+    @classmethod
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_feeds_are_streamed(self):
+        """Ленты отдаются по частям, шапка раньше постов."""
+        for address in self.feed_pages:
+            with self.subTest(address=address):
+                response = self.authorized_client.get(address)
+                chunks = [
+                    chunk.decode() for chunk in response.streaming_content
+                ]
+                head_index = next(
+                    i for i, chunk in enumerate(chunks) if '<head>' in chunk
+                )
+                post_index = next(
+                    i for i, chunk in enumerate(chunks)
+                    if self.post.text in chunk
+                )
+
+                self.assertTrue(response.streaming)
+                self.assertLess(head_index, post_index)
+
+    def test_streamed_feed_is_gzipped(self):
+        """Потоковый ответ сжимается gzip по частям."""
+        response = self.authorized_client.get(
+            reverse('posts:index'),
+            HTTP_ACCEPT_ENCODING='gzip',
+        )
+        content = gzip.decompress(b''.join(response.streaming_content))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(self.post.text, content.decode())
+
+    def test_public_feeds_are_cached_not_streamed(self):
+        """Гости получают ленты целиком, и они попадают в кэш страниц."""
+        for address in self.feed_pages:
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+
+                self.assertFalse(response.streaming)
+                self.assertContains(response, self.post.text)
+                with self.assertNumQueries(0):
+                    self.guest_client.get(address)
+
+    @override_settings(FRAGMENTS_MODE='esi')
+    def test_shared_feeds_are_not_streamed(self):
+        """С фрагментами лента общая и вошедшим не отдаётся потоком."""
+        response = self.authorized_client.get(reverse('posts:index'))
 
+        self.assertFalse(response.streaming)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class FollowingTests(TestCase):
 
     @classmethod
@@ -436,6 +587,11 @@ class FollowingTests(TestCase):
     def setUp(self) -> None:
         cache.clear()
 
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
     def test_profile_follow_authorized(self):
         """Авторизованный пользователь может подписаться на автора"""
         self.auth_client.get(
@@ -511,3 +667,568 @@ class FollowingTests(TestCase):
         ).count()
 
         self.assertEqual(follower_number, 0)
+
+
+class BulkFollowTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username='auth')
+        cls.auth_client = Client()
+        cls.auth_client.force_login(cls.user)
+
+        cls.authors = [
+            User.objects.create_user(username=f'author-{x}')
+            for x in range(USERS_ON_PAGE + 2)
+        ]
+
+    def test_follow_bulk(self):
+        """Подписка на нескольких авторов, повторы и себя игнорируются."""
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        usernames = [author.username for author in self.authors[:3]]
+
+        response = self.auth_client.post(
+            reverse('posts:follow_bulk'),
+            {'username': usernames + [usernames[0], self.user.username]},
+        )
+
+        self.assertRedirects(response, reverse('posts:follow_index'))
+        self.assertEqual(
+            set(
+                Follow.objects.filter(user=self.user).values_list(
+                    'author__username', flat=True,
+                )
+            ),
+            set(usernames),
+        )
+
+    def test_follow_bulk_updates_trending_in_batch(self):
+        """Рейтинг последних постов обновляется одной порцией запросов,
+        сколько бы авторов ни было."""
+        for author in self.authors:
+            Post.objects.create(author=author, text='Старый пост')
+        latest = [
+            Post.objects.create(author=author, text='Новый пост')
+            for author in self.authors
+        ]
+        first, second = (
+            User.objects.create_user(username=f'reader-{x}') for x in range(2)
+        )
+        follow_authors(first, [self.authors[0].pk])
+
+        # в обоих случаях есть и новые рейтинги, и уже существующие
+        with CaptureQueriesContext(connection) as few:
+            follow_authors(second, [author.pk for author in self.authors[:2]])
+        with CaptureQueriesContext(connection) as many:
+            follow_authors(self.user, [author.pk for author in self.authors])
+
+        self.assertEqual(len(many.captured_queries), len(few.captured_queries))
+        scores = dict(PostActivity.objects.values_list('post_id', 'score'))
+        self.assertEqual(set(scores), {post.pk for post in latest})
+        for post, followers in zip(latest, [3, 2] + [1] * len(latest)):
+            self.assertAlmostEqual(
+                scores[post.pk], FOLLOW_WEIGHT * followers, places=3
+            )
+
+    def test_follow_bulk_requires_post(self):
+        """Массовая подписка доступна только POST-запросом."""
+        response = self.auth_client.get(reverse('posts:follow_bulk'))
+
+        self.assertEqual(response.status_code, 405)
+
+    def test_unfollow_bulk(self):
+        """Отписка от нескольких авторов одним запросом."""
+        for author in self.authors[:3]:
+            Follow.objects.create(user=self.user, author=author)
+
+        self.auth_client.post(
+            reverse('posts:unfollow_bulk'),
+            {'username': [self.authors[0].username, self.authors[1].username]},
+        )
+
+        self.assertEqual(
+            list(
+                Follow.objects.filter(user=self.user).values_list(
+                    'author', flat=True,
+                )
+            ),
+            [self.authors[2].pk],
+        )
+
+    def test_follower_list_keyset_pages(self):
+        """Список подписчиков листается курсором без повторов."""
+        target = self.authors[0]
+        for follower in self.authors[1:]:
+            Follow.objects.create(user=follower, author=target)
+        address = reverse(
+            'posts:profile_followers', kwargs={'username': target.username}
+        )
+
+        first_page = self.auth_client.get(address).context['page']
+        second_page = self.auth_client.get(
+            address, {'cursor': first_page.next_cursor}
+        ).context['page']
+
+        self.assertEqual(len(first_page), USERS_ON_PAGE)
+        self.assertTrue(first_page.has_next)
+        self.assertEqual(
+            len(second_page), len(self.authors) - 1 - USERS_ON_PAGE
+        )
+        self.assertFalse(second_page.has_next)
+        self.assertEqual(
+            {follow.user for follow in first_page}
+            | {follow.user for follow in second_page},
+            set(self.authors[1:]),
+        )
+
+    def test_following_list(self):
+        """Список подписок пользователя."""
+        Follow.objects.create(user=self.user, author=self.authors[0])
+
+        response = self.auth_client.get(
+            reverse(
+                'posts:profile_following',
+                kwargs={'username': self.user.username},
+            ),
+            {'cursor': 'испорченный'},
+        )
+
+        self.assertEqual(response.context['users'], [self.authors[0]])
+
+
+class GroupIndexTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.guest_client = Client()
+        cls.user = User.objects.create_user(username='auth')
+
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {x:02}',
+                slug=f'group-{x}',
+                description='Тестовое описание',
+            )
+            for x in range(GROUPS_ON_PAGE + 1)
+        ]
+        for x in range(3):
+            cls.latest_post = Post.objects.create(
+                text=f'Пост {x}',
+                author=cls.user,
+                group=cls.groups[0],
+            )
+
+    @classmethod
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_group_index_counts_and_latest_post(self):
+        """Каталог групп показывает число постов и последний пост."""
+        with self.assertNumQueries(2):
+            response = self.guest_client.get(reverse('posts:group_index'))
+            groups = list(response.context['page_obj'])
+
+        first, empty = groups[0], groups[1]
+        self.assertEqual(len(groups), GROUPS_ON_PAGE)
+        self.assertEqual(first.posts_count, 3)
+        self.assertEqual(first.latest_post_id, self.latest_post.pk)
+        self.assertEqual(first.latest_post_excerpt, self.latest_post.excerpt)
+        self.assertEqual(empty.posts_count, 0)
+        self.assertIsNone(empty.latest_post_id)
+
+    def test_group_index_second_page(self):
+        """Каталог групп разбит на страницы."""
+        response = self.guest_client.get(
+            reverse('posts:group_index'), {'page': 2}
+        )
+
+        self.assertEqual(
+            list(response.context['page_obj']), [self.groups[-1]]
+        )
+
+
+@override_settings(FRAGMENTS_MODE='esi')
+class FragmentsTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.post = Post.objects.create(author=cls.author, text='Общий пост')
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+        cls.guest_client = Client()
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_page_contains_esi_includes(self):
+        """Вместо персональных частей страницы стоят <esi:include>."""
+        response = self.authorized_client.get(
+            reverse('posts:profile', kwargs={'username': 'writer'})
+        )
+        content = response.content.decode()
+        button_url = reverse(
+            'posts:follow_button', kwargs={'username': 'writer'}
+        )
+
+        self.assertEqual(response['Surrogate-Control'], 'content="ESI/1.0"')
+        self.assertIn(f'<esi:include src="{button_url}" />', content)
+        self.assertNotIn('Пользователь: reader', content)
+        self.assertNotIn('Отписаться', content)
+
+    def test_authorized_user_gets_shared_cached_page(self):
+        """Вошедший пользователь получает ту же закэшированную страницу."""
+        index_url = reverse('posts:index')
+        guest_response = self.guest_client.get(index_url)
+        Post.objects.filter(pk=self.post.pk).update(text='Изменённый пост')
+        response = self.authorized_client.get(index_url)
+
+        self.assertEqual(response.content, guest_response.content)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertNotIn('Cookie', response.get('Vary', ''))
+
+    def test_fragments_are_personal(self):
+        """Фрагменты рендерятся для пользователя и не кэшируются прокси."""
+        fragments = {
+            reverse('core:fragment', kwargs={'name': 'header'}):
+                'Пользователь: reader',
+            reverse('posts:follow_button', kwargs={'username': 'writer'}):
+                'Отписаться',
+        }
+        for address, expected in fragments.items():
+            with self.subTest(address=address):
+                response = self.authorized_client.get(address)
+
+                self.assertContains(response, expected)
+                self.assertIn('private', response['Cache-Control'])
+                self.assertIn('Cookie', response['Vary'])
+
+    def test_unknown_fragment_not_found(self):
+        """Неизвестный фрагмент — 404."""
+        response = self.guest_client.get(
+            reverse('core:fragment', kwargs={'name': 'unknown'})
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(SSE_STREAM_TIMEOUT=0)
+@override_settings(SSE_ENABLED=True)
+class EventStreamTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.stranger = User.objects.create_user(username='stranger')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            description='Тестовое описание',
+            slug='group-slug',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def read_events(self, url, **params):
+        response = self.authorized_client.get(url, params)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join(response.streaming_content).decode()
+
+    def test_post_events_stream_new_comments(self):
+        """Новый комментарий приходит подписчикам поста."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        detail = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        Comment.objects.create(post=post, author=self.user, text='Привет')
+
+        content = self.read_events(
+            reverse('posts:post_events', kwargs={'post_id': post.pk}),
+            last_id=detail.context['events_since'],
+        )
+
+        self.assertIn('id: 1\n', content)
+        self.assertIn('Привет', content)
+
+    def test_follow_events_only_followed_authors(self):
+        """В поток ленты подписок попадают только посты авторов из неё."""
+        since = self.authorized_client.get(
+            reverse('posts:follow_index')
+        ).context['events_since']
+        Post.objects.create(
+            author=self.stranger, text='Чужой пост', group=self.group
+        )
+        Post.objects.create(
+            author=self.author, text='Пост автора', group=self.group
+        )
+
+        content = self.read_events(
+            reverse('posts:follow_events'), last_id=since
+        )
+
+        self.assertIn('Пост автора', content)
+        self.assertNotIn('Чужой пост', content)
+
+    def test_no_streams_for_guests_or_when_disabled(self):
+        """Гостям и при выключенном SSE_ENABLED поток не открывается."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        detail_url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        events_url = reverse('posts:post_events', kwargs={'post_id': post.pk})
+        guest = Client()
+
+        self.assertNotContains(guest.get(detail_url), 'data-events-src="')
+        self.assertEqual(
+            guest.get(events_url).status_code, HTTPStatus.NO_CONTENT
+        )
+        with self.settings(SSE_ENABLED=False):
+            self.assertNotContains(
+                self.authorized_client.get(detail_url), 'data-events-src="'
+            )
+            self.assertEqual(
+                self.authorized_client.get(events_url).status_code,
+                HTTPStatus.NO_CONTENT,
+            )
+        self.assertContains(
+            self.authorized_client.get(detail_url), 'data-events-src="'
+        )
+
+
+class FeedDeltaTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.stranger = User.objects.create_user(username='stranger')
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+        cls.guest_client = Client()
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def setUp(self) -> None:
+        cache.clear()
+        Post.objects.create(author=self.author, text='Старый пост')
+
+    def get_delta(self, client, name, since=None):
+        params = {'since': since} if since else {}
+        return client.get(reverse(name), params).json()
+
+    def test_delta_returns_only_new_posts(self):
+        """Дельта содержит только посты новее курсора."""
+        start = self.get_delta(self.guest_client, 'posts:index_delta')
+        Post.objects.create(author=self.stranger, text='Новый пост 1')
+        Post.objects.create(author=self.author, text='Новый пост 2')
+
+        delta = self.get_delta(
+            self.guest_client, 'posts:index_delta', start['cursor']
+        )
+
+        self.assertEqual(start['count'], 0)
+        self.assertEqual(delta['count'], 2)
+        self.assertEqual(
+            [post['text'] for post in delta['posts']],
+            ['Новый пост 2', 'Новый пост 1'],
+        )
+        again = self.get_delta(
+            self.guest_client, 'posts:index_delta', delta['cursor']
+        )
+        self.assertEqual(again['count'], 0)
+
+    def test_no_queries_without_new_posts(self):
+        """Опрос без новых постов не обращается к базе."""
+        cursor = self.get_delta(self.guest_client, 'posts:index_delta')[
+            'cursor'
+        ]
+
+        with self.assertNumQueries(0):
+            delta = self.get_delta(
+                self.guest_client, 'posts:index_delta', cursor
+            )
+        self.assertEqual(delta['cursor'], cursor)
+
+    def test_follow_delta_only_followed_authors(self):
+        """Дельта подписок содержит только посты авторов из подписок."""
+        cursor = self.get_delta(
+            self.authorized_client, 'posts:follow_delta'
+        )['cursor']
+        Post.objects.create(author=self.stranger, text='Чужой пост')
+        Post.objects.create(author=self.author, text='Пост автора')
+
+        delta = self.get_delta(
+            self.authorized_client, 'posts:follow_delta', cursor
+        )
+
+        self.assertEqual(
+            [post['text'] for post in delta['posts']], ['Пост автора']
+        )
+
+
+class ViewCountTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.guest_client = Client()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self) -> None:
+        flush_views()
+        self.posts = [
+            Post.objects.create(author=self.user, text=f'Пост {i}')
+            for i in range(3)
+        ]
+
+    def view(self, post, times=1):
+        for _ in range(times):
+            response = self.guest_client.get(
+                reverse('posts:post_detail', kwargs={'post_id': post.pk})
+            )
+        return response
+
+    def test_views_buffered_and_flushed_in_one_query(self):
+        """Просмотры копятся в памяти и пишутся одним UPDATE."""
+        response = self.view(self.posts[0], times=3)
+        self.view(self.posts[1])
+
+        self.assertEqual(response.context['views'], 3)
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).views, 0)
+        with self.assertNumQueries(1):
+            flushed = flush_views()
+        self.assertEqual(flushed, 4)
+        self.assertEqual(
+            dict(Post.objects.values_list('text', 'views')),
+            {'Пост 0': 3, 'Пост 1': 1, 'Пост 2': 0},
+        )
+
+    def test_most_viewed_order(self):
+        """Страница самого читаемого отсортирована по просмотрам."""
+        self.view(self.posts[1], times=2)
+        self.view(self.posts[2])
+        flush_views()
+
+        response = self.guest_client.get(reverse('posts:most_viewed'))
+
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']],
+            ['Пост 1', 'Пост 2', 'Пост 0'],
+        )
+
+
+class FeedPreviewTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.guest_client = Client()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Длинное описание группы',
+        )
+        cls.short = Post.objects.create(
+            author=cls.user, group=cls.group, text='Короткий пост',
+        )
+        cls.long = Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text='Длинный пост ' * PREVIEW_HTML_LENGTH,
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_feeds_read_bounded_text(self):
+        """Ленты не читают полный текст: длинный пост — по excerpt."""
+        for address in (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+        ):
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+
+                page = response.context['page_obj']
+                posts = {post.pk: post for post in page}
+                self.assertEqual(
+                    posts[self.short.pk].html_preview, '<p>Короткий пост</p>'
+                )
+                self.assertEqual(posts[self.long.pk].html_preview, '')
+                self.assertTrue(
+                    {'text', 'rendered_html'}
+                    <= posts[self.long.pk].get_deferred_fields()
+                )
+                self.assertContains(response, self.long.excerpt)
+                self.assertContains(response, reverse(
+                    'posts:post_detail', kwargs={'post_id': self.long.pk}
+                ))
+                self.assertNotContains(response, self.long.rendered_html)
+
+    def test_feed_defers_group_description(self):
+        """Описание группы в ленте не загружается."""
+        response = self.guest_client.get(reverse('posts:index'))
+
+        post = response.context['page_obj'][0]
+        self.assertIn('description', post.group.get_deferred_fields())
+
+    def test_unrendered_posts_without_extra_queries(self):
+        """Пост без rendered_html показывается по text без запроса
+        на каждый пост."""
+        def count_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.guest_client.get(reverse('posts:index'))
+            return len(queries), response
+
+        Post.objects.bulk_create([
+            Post(author=self.user, group=self.group, text='Старый пост 0')
+        ])
+        before, _ = count_queries()
+        Post.objects.bulk_create([
+            Post(author=self.user, group=self.group, text=f'Старый пост {i}')
+            for i in range(1, 5)
+        ])
+        after, response = count_queries()
+
+        self.assertEqual(before, after)
+        for i in range(5):
+            self.assertContains(response, f'<p>Старый пост {i}</p>')
+
+    def test_migration_renders_existing_posts(self):
+        """Миграция 0020 заполняет поля постов, созданных до неё."""
+        migration = import_module(
+            'posts.migrations.0020_render_existing_posts'
+        )
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'Старый\n\nпост {i}')
+            for i in range(3)
+        ])
+
+        migration.render_existing_posts(apps, None)
+
+        self.assertFalse(Post.objects.filter(rendered_html='').exists())
+        self.assertEqual(
+            Post.objects.filter(excerpt='Старый пост 1').count(), 1
+        )
@@ -0,0 +1,79 @@
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from ..counters import pending_views
+from ..models import Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEST_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class WarmCacheTests(TransactionTestCase):
+    """Команда работает в потоках со своими соединениями с БД, поэтому
+    данные теста должны быть закоммичены."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            description='Тестовое описание',
+            slug='group-slug',
+        )
+        self.post = Post.objects.create(
+            author=self.user,
+            text='Тестовый пост',
+            group=self.group,
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=TEST_GIF,
+                content_type='image/gif',
+            ),
+        )
+
+    def test_pages_are_cached_after_warming(self):
+        """После прогрева ленты отдаются из кэша без запросов к БД."""
+        out = io.StringIO()
+        call_command('warm_cache', pages=1, host='testserver', stdout=out)
+
+        self.assertIn('Прогрето страниц: 4 из 4, миниатюр: 2', out.getvalue())
+        for address in (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group-slug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+        ):
+            with self.subTest(address=address):
+                with self.assertNumQueries(0):
+                    response = Client().get(address)
+
+                self.assertContains(response, self.post.text)
+
+    def test_warming_does_not_count_views(self):
+        """Прогрев страниц постов не добавляет им просмотров."""
+        views = pending_views(self.post.pk)
+
+        call_command('warm_cache', pages=1, host='testserver',
+                     stdout=io.StringIO())
+
+        self.assertEqual(pending_views(self.post.pk), views)
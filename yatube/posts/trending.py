@@ -0,0 +1,142 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import Post, PostActivity, TrendingEntry, User
+
+COMMENT_WEIGHT: float = 1.0
+FOLLOW_WEIGHT: float = 3.0
+HALF_LIFE: timedelta = timedelta(hours=24)
+# активность старше окна почти обнулилась и в рейтинг не попадает
+ACTIVITY_WINDOW: timedelta = timedelta(days=7)
+TOP_POSTS: int = 20
+TOP_GROUPS: int = 10
+
+
+def decay(score, since, now):
+    """Рейтинг score, набранный к моменту since, пересчитанный на now."""
+    return score * 0.5 ** ((now - since) / HALF_LIFE)
+
+
+def record_activity(post_id, weight, now=None):
+    """Прибавляет вес события к рейтингу одного поста."""
+    record_activities({post_id: weight}, now)
+
+
+def record_activities(weights, now=None):
+    """Прибавляет веса событий к рейтингу постов: {pk поста: вес}.
+
+    На всю порцию — одна транзакция: чтение рейтингов, один UPDATE
+    существующих и один INSERT новых.
+    """
+    if not weights:
+        return
+    now = now or timezone.now()
+    with transaction.atomic():
+        # транзакция начинается с записи: SQLite сразу берёт блокировку
+        # на запись и ждёт её по busy_timeout, а читающая транзакция
+        # при переходе к записи получила бы database is locked без ожидания
+        PostActivity.objects.filter(post_id__in=weights).update(
+            updated=F('updated'),
+        )
+        activities = list(
+            PostActivity.objects.select_for_update().filter(
+                post_id__in=weights,
+            )
+        )
+        for activity in activities:
+            activity.score = decay(activity.score, activity.updated, now)
+            activity.score += weights[activity.post_id]
+            activity.updated = now
+        PostActivity.objects.bulk_update(activities, ('score', 'updated'))
+        existing = {activity.post_id for activity in activities}
+        PostActivity.objects.bulk_create([
+            PostActivity(post_id=post_id, score=weight, updated=now)
+            for post_id, weight in weights.items()
+            if post_id not in existing
+        ])
+
+
+def record_follow(author_id, now=None):
+    """Подписка засчитывается последнему посту автора."""
+    record_follows([author_id], now)
+
+
+def record_follows(author_ids, now=None):
+    """Подписки на авторов засчитываются их последним постам; последние
+    посты всех авторов читаются одним запросом."""
+    latest_post = Post.objects.filter(author=OuterRef('pk')).values('pk')
+    post_ids = User.objects.filter(pk__in=author_ids).annotate(
+        latest_post_id=Subquery(latest_post[:1]),
+    ).exclude(latest_post_id=None).values_list('latest_post_id', flat=True)
+    record_activities(
+        {post_id: FOLLOW_WEIGHT for post_id in post_ids}, now
+    )
+
+
+def refresh_trending(now=None):
+    """Пересобирает таблицу TrendingEntry по активности за ACTIVITY_WINDOW.
+
+    Читаются только посты с недавней активностью, а не вся таблица постов.
+    """
+    now = now or timezone.now()
+    since = now - ACTIVITY_WINDOW
+    activities = PostActivity.objects.filter(
+        updated__gte=since,
+    ).values_list('post_id', 'post__group_id', 'score', 'updated')
+
+    scored = sorted(
+        (
+            (decay(score, updated, now), post_id, group_id)
+            for post_id, group_id, score, updated in activities
+        ),
+        reverse=True,
+    )
+
+    entries = [
+        TrendingEntry(
+            scope=TrendingEntry.POSTS, post_id=post_id, rank=rank, score=score,
+        )
+        for rank, (score, post_id, _) in enumerate(scored[:TOP_POSTS], 1)
+    ]
+
+    group_posts = defaultdict(list)
+    group_scores = defaultdict(float)
+    for score, post_id, group_id in scored:
+        if group_id is None:
+            continue
+        group_scores[group_id] += score
+        if len(group_posts[group_id]) < TOP_POSTS:
+            group_posts[group_id].append((score, post_id))
+
+    for group_id, posts in group_posts.items():
+        entries.extend(
+            TrendingEntry(
+                scope=TrendingEntry.GROUP_POSTS,
+                group_id=group_id,
+                post_id=post_id,
+                rank=rank,
+                score=score,
+            )
+            for rank, (score, post_id) in enumerate(posts, 1)
+        )
+
+    top_groups = sorted(
+        group_scores.items(), key=lambda item: item[1], reverse=True,
+    )[:TOP_GROUPS]
+    entries.extend(
+        TrendingEntry(
+            scope=TrendingEntry.GROUPS, group_id=group_id, rank=rank,
+            score=score,
+        )
+        for rank, (group_id, score) in enumerate(top_groups, 1)
+    )
+
+    with transaction.atomic():
+        PostActivity.objects.filter(updated__lt=since).delete()
+        TrendingEntry.objects.all().delete()
+        TrendingEntry.objects.bulk_create(entries)
+    return len(entries)
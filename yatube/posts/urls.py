@@ -7,6 +7,8 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('delta/', views.index_delta, name='index_delta'),
+    path('groups/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
@@ -18,6 +20,13 @@ urlpatterns = [
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path(
+        'posts/<int:post_id>/events/',
+        views.post_events,
+        name='post_events'
+    ),
+    path('follow/events/', views.follow_events, name='follow_events'),
+    path('follow/delta/', views.follow_delta, name='follow_delta'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -28,4 +37,34 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path(
+        'profile/<str:username>/follow-button/',
+        views.follow_button,
+        name='follow_button'
+    ),
+    path('follow/bulk/', views.follow_bulk, name='follow_bulk'),
+    path('unfollow/bulk/', views.unfollow_bulk, name='unfollow_bulk'),
+    path(
+        'profile/<str:username>/followers/',
+        views.profile_followers,
+        name='profile_followers'
+    ),
+    path(
+        'profile/<str:username>/following/',
+        views.profile_following,
+        name='profile_following'
+    ),
+    path(
+        'profile/<str:username>/mentions/',
+        views.mention_posts,
+        name='mention_posts'
+    ),
+    path('tags/<str:tag>/', views.tag_posts, name='tag_posts'),
+    path('trending/', views.trending, name='trending'),
+    path('popular/', views.most_viewed, name='most_viewed'),
+    path(
+        'trending/<slug:slug>/',
+        views.trending_group,
+        name='trending_group'
+    ),
 ]
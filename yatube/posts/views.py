@@ -1,12 +1,47 @@
+from http import HTTPStatus
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db.models import (Case, Count, F, IntegerField, OuterRef,
+                              Prefetch, Subquery, TextField, Value, When)
+from django.db.models.functions import Coalesce, Length, Substr
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_POST
+
+from core import pubsub
+from core.cache import cache_public_page, is_public_page
+from core.views import private_fragment
+from core.paginator import (CountQuerySetPaginator, KeysetPaginator,
+                            QuerySetChain)
+from core.ratelimit import ratelimit
+from core.streaming import event_stream, stream_render
 
+
+from . import comment_queue
+from .counters import is_warmup, pending_views, record_view
+from .delta import feed_delta
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Follow
+from .models import (ArchivedPost, Follow, Group, LinkPreview, Post, Tag,
+                     TrendingEntry, User)
+from .signals import POSTS_CHANNEL, comments_channel
+from .trending import record_follows
 
 POSTS_ON_PAGE: int = 10
+PAGE_CACHE_TIMEOUT: int = 20
+USERS_ON_PAGE: int = 50
+GROUPS_ON_PAGE: int = 20
+FOLLOW_BULK_LIMIT: int = 100
+POST_CREATE_RATE = '10/m'
+COMMENT_RATE = '10/m'
+FOLLOW_RATE = '60/m'
+PREVIEW_HTML_LENGTH: int = 1000
+
+# готовые карточки ссылок одним запросом на страницу ленты
+READY_LINKS = Prefetch(
+    'links', queryset=LinkPreview.objects.filter(status=LinkPreview.READY)
+)
 
 
 def get_page(request, post_list, posts_on_page=POSTS_ON_PAGE):
@@ -15,62 +50,200 @@ def get_page(request, post_list, posts_on_page=POSTS_ON_PAGE):
     return page.get_page(page_number)
 
 
-@cache_page(20, key_prefix='index_page')
+def with_previews(posts):
+    """Посты для ленты без полного текста.
+
+    Вместо text и rendered_html выбирается html_preview — rendered_html
+    целиком, если он не длиннее PREVIEW_HTML_LENGTH, иначе пустая
+    строка: такой пост показывается по excerpt со ссылкой на страницу
+    поста. Длина считается в базе, длинные посты из неё не читаются.
+    Для поста без rendered_html (создан в обход save()) вместо него
+    выбирается text_preview — начало text той же длины.
+    Описание группы в ленте не нужно и тоже не загружается.
+    """
+    return posts.select_related('author', 'group').defer(
+        'text', 'rendered_html', 'group__description',
+    ).annotate(
+        html_length=Length('rendered_html'),
+    ).annotate(
+        html_preview=Case(
+            When(
+                html_length__lte=PREVIEW_HTML_LENGTH,
+                then=F('rendered_html'),
+            ),
+            default=Value(''),
+            output_field=TextField(),
+        ),
+        text_preview=Case(
+            When(
+                html_length=0,
+                then=Substr('text', 1, PREVIEW_HTML_LENGTH),
+            ),
+            default=Value(''),
+            output_field=TextField(),
+        ),
+    )
+
+
+def get_feed_page(request, posts):
+    # аннотации with_previews завернули бы COUNT(*) в подзапрос
+    # с длиной каждой строки, поэтому посты считаются по исходному queryset
+    paginator = CountQuerySetPaginator(
+        with_previews(posts), POSTS_ON_PAGE, count_queryset=posts,
+    )
+    return paginator.get_page(request.GET.get('page'))
+
+
+def render_feed(request, template_name, context):
+    """Рендерит ленту постов целиком или потоком (settings.STREAMING_FEEDS).
+
+    Общая страница рендерится целиком: потоковый ответ не попал бы
+    в кэш cache_public_page, и каждый гость рендерил бы ленту заново.
+    """
+    if settings.STREAMING_FEEDS and not is_public_page(request):
+        return stream_render(request, template_name, context)
+    return render(request, template_name, context)
+
+
+@cache_public_page(PAGE_CACHE_TIMEOUT, key_prefix='index_page')
 def index(request):
-    posts = Post.objects.all()
-    page_obj = get_page(request, posts, POSTS_ON_PAGE)
+    posts = Post.objects.prefetch_related(READY_LINKS)
+    page_obj = get_feed_page(request, posts)
     context = {
         'page_obj': page_obj,
     }
-    return render(request, 'posts/index.html', context)
+    return render_feed(request, 'posts/index.html', context)
 
 
+@cache_public_page(
+    PAGE_CACHE_TIMEOUT,
+    key_prefix='group_page',
+    scope=lambda slug: f'group:{slug}',
+)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = get_page(request, posts, POSTS_ON_PAGE)
+    page_obj = get_feed_page(request, group.posts.all())
     context = {
         'group': group,
         'page_obj': page_obj,
     }
-    return render(request, 'posts/group_list.html', context)
+    return render_feed(request, 'posts/group_list.html', context)
+
+
+def group_index(request):
+    """Каталог групп с числом постов и последним постом.
+
+    Число постов и последний пост считаются коррелированными подзапросами
+    по индексу (group, pub_date) только для групп текущей страницы.
+    """
+    group_posts = Post.objects.filter(group=OuterRef('pk'))
+    latest_post = group_posts.order_by('-pub_date')
+    groups = Group.objects.only('title', 'slug').annotate(
+        posts_count=Coalesce(
+            Subquery(
+                group_posts.order_by().values('group').annotate(
+                    total=Count('pk'),
+                ).values('total'),
+                output_field=IntegerField(),
+            ),
+            0,
+        ),
+        latest_post_id=Subquery(latest_post.values('pk')[:1]),
+        latest_post_excerpt=Subquery(latest_post.values('excerpt')[:1]),
+        latest_post_pub_date=Subquery(latest_post.values('pub_date')[:1]),
+    ).order_by('title')
+
+    paginator = CountQuerySetPaginator(
+        groups, GROUPS_ON_PAGE, count_queryset=Group.objects.all(),
+    )
+    context = {
+        'page_obj': paginator.get_page(request.GET.get('page')),
+    }
+    return render(request, 'posts/group_index.html', context)
 
 
+@cache_public_page(
+    PAGE_CACHE_TIMEOUT,
+    key_prefix='profile_page',
+    scope=lambda username: f'profile:{username}',
+)
 def profile(request, username):
     user = get_object_or_404(User, username=username)
-    posts = user.posts.all()
+    # архивные посты старше любого поста в Post, поэтому идут следом
+    live = user.posts.prefetch_related(READY_LINKS)
+    archived = user.archived_posts.all()
+    posts = QuerySetChain(
+        with_previews(live),
+        with_previews(archived),
+        count_querysets=(live, archived),
+    )
     page_obj = get_page(request, posts, POSTS_ON_PAGE)
     following = (
-        request.user != user
-        and request.user.is_authenticated
-        and Follow.objects.filter(
-            user=request.user,
-            author=user,
-        ).exists()
+        settings.FRAGMENTS_MODE == 'inline'
+        and is_following(request.user, user)
     )
     context = {
         'author': user,
         'page_obj': page_obj,
         'following': following,
     }
-    return render(request, 'posts/profile.html', context)
+    return render_feed(request, 'posts/profile.html', context)
+
+
+def is_following(user, author):
+    return (
+        user != author
+        and user.is_authenticated
+        and Follow.objects.filter(user=user, author=author).exists()
+    )
+
+
+def follow_button(request, username):
+    """Кнопка подписки на странице профиля (персональный фрагмент)"""
+    author = get_object_or_404(User, username=username)
+    context = {
+        'author': author,
+        'following': is_following(request.user, author),
+    }
+    return private_fragment(
+        render(request, 'includes/follow_button.html', context)
+    )
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    post_count = post.author.posts.count()
+    post = Post.objects.prefetch_related(READY_LINKS).filter(
+        id=post_id
+    ).first()
+    archived = post is None
+    if archived:
+        post = get_object_or_404(ArchivedPost, id=post_id)
+    elif not is_warmup(request):
+        record_view(post.pk)
+    post_count = (
+        post.author.posts.count() + post.author.archived_posts.count()
+    )
     form = CommentForm(request.POST or None)
     comments = post.comments.all()
+    if settings.COMMENTS_WRITE_BEHIND and request.user.is_authenticated:
+        comments = (
+            comment_queue.pending(post.pk, request.user) + list(comments)
+        )
     context = {
         'post': post,
         'post_count': post_count,
         'form': form,
         'comments': comments,
+        'archived': archived,
+        'events_since': events_since(
+            request, None if archived else comments_channel(post.id)
+        ),
+        'views': 0 if archived else post.views + pending_views(post.pk),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
+@ratelimit(POST_CREATE_RATE, methods=('POST',))
 def post_create(request):
     is_edit = False
     form = PostForm(
@@ -119,6 +292,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit(COMMENT_RATE)
 def add_comment(request, post_id):
     post = get_object_or_404(
         Post.objects.select_related('group', 'author'),
@@ -127,10 +301,15 @@ def add_comment(request, post_id):
     form = CommentForm(request.POST or None)
 
     if form.is_valid():
-        comment = form.save(commit=False)
-        comment.author = request.user
-        comment.post = post
-        comment.save()
+        if settings.COMMENTS_WRITE_BEHIND:
+            comment_queue.enqueue(
+                post.pk, request.user.pk, form.cleaned_data['text']
+            )
+        else:
+            comment = form.save(commit=False)
+            comment.author = request.user
+            comment.post = post
+            comment.save()
 
     return redirect('posts:post_detail', post_id=post_id)
 
@@ -138,26 +317,118 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     """Подписки пользователя"""
-    posts = Post.objects.select_related(
-        'author',
-        'group',
-    ).filter(author__following__user=request.user)
-
-    page_obj = get_page(request, posts, POSTS_ON_PAGE)
+    posts = Post.objects.filter(author__following__user=request.user)
+    page_obj = get_feed_page(request, posts)
 
     context = {
         'page_obj': page_obj,
+        'events_since': events_since(request, POSTS_CHANNEL),
     }
     return render(request, 'posts/follow.html', context)
 
 
+def index_delta(request):
+    """Посты главной новее курсора ?since (JSON)"""
+    return JsonResponse(
+        feed_delta(Post.objects.all(), request.GET.get('since'))
+    )
+
+
+@login_required
+def follow_delta(request):
+    """Посты подписок новее курсора ?since (JSON)"""
+    posts = Post.objects.filter(author__following__user=request.user)
+    return JsonResponse(feed_delta(posts, request.GET.get('since')))
+
+
+def sse_allowed(request):
+    """Потоки событий включены (settings.SSE_ENABLED) и нужны
+    только вошедшим пользователям: на Django 2.2 каждый поток держит
+    синхронный воркер до SSE_STREAM_TIMEOUT секунд."""
+    return settings.SSE_ENABLED and request.user.is_authenticated
+
+
+def events_since(request, channel):
+    """Номер события для ?last_id на странице или None, если поток
+    событий странице не нужен."""
+    if channel is None or not sse_allowed(request):
+        return None
+    return pubsub.last_event_id(channel)
+
+
+def no_events():
+    # на ответ 204 EventSource не переподключается
+    return HttpResponse(status=HTTPStatus.NO_CONTENT)
+
+
+def last_event_id(request):
+    """Номер последнего полученного клиентом события.
+
+    При переподключении EventSource присылает его в Last-Event-ID,
+    при первом — страница передаёт его в ?last_id.
+    """
+    value = request.META.get(
+        'HTTP_LAST_EVENT_ID', request.GET.get('last_id', '')
+    )
+    return int(value) if value.isdigit() else None
+
+
+def post_events(request, post_id):
+    """Новые комментарии к посту потоком Server-Sent Events"""
+    if not sse_allowed(request):
+        return no_events()
+    post = get_object_or_404(Post, id=post_id)
+    events = pubsub.listen(comments_channel(post.id), last_event_id(request))
+    return event_stream(events)
+
+
+@login_required
+def follow_events(request):
+    """Новые посты авторов из подписок потоком Server-Sent Events"""
+    if not sse_allowed(request):
+        return no_events()
+    authors = set(
+        Follow.objects.filter(user=request.user).values_list(
+            'author_id', flat=True
+        )
+    )
+    events = (
+        (event_id, data)
+        for event_id, data in pubsub.listen(
+            POSTS_CHANNEL, last_event_id(request)
+        )
+        if event_id is None or data['author_id'] in authors
+    )
+    return event_stream(events)
+
+
+def follow_authors(user, author_ids):
+    """Подписывает пользователя на авторов одним INSERT.
+
+    Повторные подписки отбрасывает уникальное ограничение unique_follow,
+    поэтому гонка двух одновременных запросов не создаёт дублей.
+    """
+    author_ids = set(author_ids) - {user.pk}
+    existing = set(
+        Follow.objects.filter(
+            user=user,
+            author_id__in=author_ids,
+        ).values_list('author_id', flat=True)
+    )
+    Follow.objects.bulk_create(
+        [Follow(user=user, author_id=pk) for pk in author_ids - existing],
+        ignore_conflicts=True,
+    )
+    # bulk_create не отправляет post_save, рейтинг обновляем сами
+    record_follows(author_ids - existing)
+
+
 @login_required
+@ratelimit(FOLLOW_RATE, scope='follow')
 def profile_follow(request, username):
     """Подписка на автора"""
     user = get_object_or_404(User, username=username)
-
-    if username != request.user.username:
-        Follow.objects.get_or_create(user=request.user, author=user)
+    follow_authors(request.user, [user.pk])
 
     return redirect("posts:profile", username=username)
 
@@ -172,3 +443,143 @@ def profile_unfollow(request, username):
     ).delete()
 
     return redirect("posts:profile", username=username)
+
+
+@login_required
+@require_POST
+@ratelimit(FOLLOW_RATE, scope='follow')
+def follow_bulk(request):
+    """Подписка на несколько авторов сразу"""
+    usernames = request.POST.getlist('username')[:FOLLOW_BULK_LIMIT]
+    author_ids = User.objects.filter(
+        username__in=usernames,
+    ).values_list('pk', flat=True)
+    follow_authors(request.user, author_ids)
+
+    return redirect('posts:follow_index')
+
+
+@login_required
+@require_POST
+def unfollow_bulk(request):
+    """Отписка от нескольких авторов сразу"""
+    usernames = request.POST.getlist('username')[:FOLLOW_BULK_LIMIT]
+    Follow.objects.filter(
+        user=request.user,
+        author__username__in=usernames,
+    ).delete()
+
+    return redirect('posts:follow_index')
+
+
+def profile_followers(request, username):
+    """Подписчики автора"""
+    author = get_object_or_404(User, username=username)
+    follows = Follow.objects.select_related('user').filter(author=author)
+    page = KeysetPaginator(follows, USERS_ON_PAGE).get_page(
+        request.GET.get('cursor')
+    )
+
+    context = {
+        'author': author,
+        'page': page,
+        'users': [follow.user for follow in page],
+        'followers': True,
+    }
+    return render(request, 'posts/follow_list.html', context)
+
+
+def profile_following(request, username):
+    """Авторы, на которых подписан пользователь"""
+    author = get_object_or_404(User, username=username)
+    follows = Follow.objects.select_related('author').filter(user=author)
+    page = KeysetPaginator(follows, USERS_ON_PAGE).get_page(
+        request.GET.get('cursor')
+    )
+
+    context = {
+        'author': author,
+        'page': page,
+        'users': [follow.author for follow in page],
+        'followers': False,
+    }
+    return render(request, 'posts/follow_list.html', context)
+
+
+def trending(request):
+    """Популярные посты и группы из предрассчитанного топа"""
+    entries = TrendingEntry.objects.select_related(
+        'post__author',
+        'post__group',
+        'group',
+    ).defer('post__text').filter(
+        scope__in=(TrendingEntry.POSTS, TrendingEntry.GROUPS)
+    )
+
+    context = {
+        'posts': [
+            entry.post for entry in entries
+            if entry.scope == TrendingEntry.POSTS
+        ],
+        'groups': [
+            entry.group for entry in entries
+            if entry.scope == TrendingEntry.GROUPS
+        ],
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+def tagged_feed(request, posts, title):
+    page = KeysetPaginator(
+        with_previews(posts),
+        POSTS_ON_PAGE,
+        ('-pub_date', '-pk'),
+    ).get_page(request.GET.get('cursor'))
+    return render(request, 'posts/tag_posts.html', {
+        'page': page,
+        'title': title,
+    })
+
+
+def tag_posts(request, tag):
+    """Посты с хэштегом"""
+    tag = get_object_or_404(Tag, name=tag.lower())
+    return tagged_feed(request, tag.posts.all(), str(tag))
+
+
+def mention_posts(request, username):
+    """Посты, в которых упомянут пользователь"""
+    user = get_object_or_404(User, username=username)
+    return tagged_feed(
+        request, user.mentioned_in.all(), f'Упоминания @{user.username}'
+    )
+
+
+def most_viewed(request):
+    """Самые просматриваемые посты"""
+    posts = Post.objects.order_by('-views', '-pk')
+    page_obj = get_feed_page(request, posts)
+    return render(request, 'posts/most_viewed.html', {'page_obj': page_obj})
+
+
+def trending_group(request, slug):
+    """Популярные посты группы"""
+    entries = list(
+        TrendingEntry.objects.select_related(
+            'post__author',
+            'post__group',
+            'group',
+        ).defer('post__text').filter(
+            scope=TrendingEntry.GROUP_POSTS, group__slug=slug
+        )
+    )
+    if entries:
+        group = entries[0].group
+    else:
+        group = get_object_or_404(Group, slug=slug)
+
+    context = {
+        'group': group,
+        'posts': [entry.post for entry in entries],
+    }
+    return render(request, 'posts/trending.html', context)
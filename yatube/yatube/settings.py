@@ -23,7 +23,7 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 SECRET_KEY = 'au)$kyz$1k+2=!!%^uuka==@n&gy9gcu(ui=&b%-rr)i)&=w6%'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DEBUG', 'True').lower() in ('1', 'true', 'yes')
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -50,10 +50,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.EdgeSideIncludesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.SlowQueryLogMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -85,12 +90,59 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+# DB_ENGINE=postgresql переключает на PostgreSQL, DB_POOL=pgbouncer — на
+# работу через пул соединений pgbouncer (transaction pooling).
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite3')
+DB_POOL = os.getenv('DB_POOL', '')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'yatube'),
+            'USER': os.getenv('DB_USER', 'yatube'),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '6432' if DB_POOL == 'pgbouncer' else '5432'),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+            # pgbouncer в режиме transaction не поддерживает серверные курсоры
+            'DISABLE_SERVER_SIDE_CURSORS': DB_POOL == 'pgbouncer',
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+            # тестовая база в файле, как и рабочая: в памяти нет WAL,
+            # и параллельная запись в тестах ничего бы не проверяла
+            'TEST': {'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3')},
+        }
     }
+
+# проверять постоянные соединения в начале каждого запроса (core.db)
+DB_CONN_HEALTH_CHECKS = True
+
+# PRAGMA, выполняемые для каждого нового соединения с SQLite (core.db)
+SQLITE_PRAGMAS = {
+    # читатели не блокируют писателей, а писатели — читателей
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    # отрицательное значение задаёт размер кэша страниц в КиБ
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -64 * 1024)),
+    # сколько миллисекунд ждать снятия блокировки вместо ошибки database is locked
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+    'temp_store': 'MEMORY',
 }
+# как часто (в секундах) выполнять PRAGMA optimize; 0 — не выполнять
+SQLITE_OPTIMIZE_INTERVAL = 60 * 60
+
+# посты старше стольких дней archive_posts переносит в архивные таблицы
+ARCHIVE_POSTS_AFTER_DAYS = int(os.getenv('ARCHIVE_POSTS_AFTER_DAYS', 365))
+# сколько постов переносить за одну транзакцию
+ARCHIVE_BATCH_SIZE = 500
 
 
 # Password validation
@@ -135,17 +187,47 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# в продакшене collectstatic кладёт файлы с хэшами в именах и их .gz/.br копии
+if not DEBUG:
+    STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
+# сроки кэширования для core.middleware.StaticFilesMiddleware (в секундах)
+STATIC_MAX_AGE = 60 * 60 * 24 * 365
+STATIC_UNHASHED_MAX_AGE = 60 * 60
+MEDIA_MAX_AGE = 60 * 60 * 24
+
+# сжатие ответов core.middleware.CompressionMiddleware
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True').lower() in ('1', 'true', 'yes')
+COMPRESSION_MIN_SIZE = 1024
+
+# отдавать ленты (index, group_posts, profile) потоком, не дожидаясь рендера;
+# только вошедшим пользователям при FRAGMENTS_MODE = 'inline': общие страницы
+# рендерятся целиком, чтобы попасть в кэш страниц (core.cache), — гость
+# получает их из кэша быстрее, чем первый байт потока
+STREAMING_FEEDS = os.getenv('STREAMING_FEEDS', 'False').lower() in ('1', 'true', 'yes')
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
 #  подключаем движок filebased.EmailBackend
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = os.getenv(
+    'EMAIL_BACKEND', 'django.core.mail.backends.filebased.EmailBackend'
+)
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# адрес сайта для ссылок в письмах
+SITE_URL = os.getenv('SITE_URL', 'http://localhost:8000')
+# сколько подписок обрабатывать за раз (одно соединение с почтой на порцию)
+DIGEST_CHUNK_SIZE = 500
+# сколько постов одного автора показывать в письме
+DIGEST_POSTS_PER_AUTHOR = 5
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
@@ -155,6 +237,72 @@ CACHES = {
     }
 }
 
+# срок кэширования в браузере страниц вошедших пользователей (core.cache)
+PRIVATE_CACHE_MAX_AGE = 0
+
+# ограничение частоты записи (core.ratelimit); счётчики хранятся в кэше,
+# для нескольких процессов он должен быть общим (memcached, redis)
+RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'True').lower() in ('1', 'true', 'yes')
+RATELIMIT_CACHE_ALIAS = 'default'
+
+# отложенная запись комментариев: add_comment кладёт комментарий в очередь
+# (отдельный файл SQLite), manage.py flush_comments переносит их в базу
+COMMENTS_WRITE_BEHIND = os.getenv('COMMENTS_WRITE_BEHIND', 'False').lower() in ('1', 'true', 'yes')
+COMMENT_QUEUE_PATH = os.getenv(
+    'COMMENT_QUEUE_PATH', os.path.join(BASE_DIR, 'comment_queue.sqlite3')
+)
+COMMENT_FLUSH_BATCH = 500
+
+# счётчики просмотров постов копятся в памяти процесса и пишутся в базу
+# одним UPDATE раз в VIEW_COUNTS_FLUSH_INTERVAL секунд или как только
+# накопится VIEW_COUNTS_MAX_PENDING разных постов
+VIEW_COUNTS_FLUSH_INTERVAL = 10
+VIEW_COUNTS_MAX_PENDING = 1000
+
+# карточки ссылок из текста постов (posts.previews): метаданные страниц
+# загружаются фоновым потоком после сохранения поста или командой
+# fetch_link_previews
+LINK_PREVIEWS_BACKGROUND = True
+LINK_PREVIEW_FETCHER = 'posts.previews.fetch_metadata'
+
+# Server-Sent Events (posts.views.post_events, follow_events): поток
+# закрывается через SSE_STREAM_TIMEOUT секунд, браузер переподключается
+# через SSE_RETRY мс; события из других процессов видны через общий кэш
+# с задержкой до PUBSUB_POLL_INTERVAL секунд
+# Каждый открытый поток занимает синхронный воркер WSGI на всё время
+# SSE_STREAM_TIMEOUT, поэтому потоки выключены по умолчанию, а включённые
+# отдаются только вошедшим пользователям; включать при достаточном числе
+# воркеров (или потоков воркера) на ожидаемое число открытых вкладок
+SSE_ENABLED = os.getenv('SSE_ENABLED', 'False').lower() in ('1', 'true', 'yes')
+SSE_STREAM_TIMEOUT = 30
+SSE_RETRY = 1000
+PUBSUB_POLL_INTERVAL = 1
+PUBSUB_CACHE_ALIAS = 'default'
+
+# профиль отдельного запроса для сотрудников: ?_profile=1 или заголовок
+# X-Profile: 1 (cProfile), значение sampling — pyinstrument, если он
+# установлен; файлы хранятся в PROFILING_DIR не дольше PROFILING_MAX_AGE
+# секунд и не больше PROFILING_MAX_FILES штук, список — /admin/profiles/
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'True').lower() in ('1', 'true', 'yes')
+PROFILING_QUERY_PARAM = '_profile'
+PROFILING_DIR = os.getenv('PROFILING_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILING_MAX_FILES = 50
+PROFILING_MAX_AGE = 7 * 24 * 60 * 60
+
+# журнал медленных запросов к базе (core.slowlog): запросы дольше
+# SLOW_QUERY_THRESHOLD секунд сохраняются в core.SlowQuery вместе с планом
+# выполнения, отчёт — manage.py slow_queries; None — журнал выключен.
+# По умолчанию выключен: включать на время поиска медленных запросов.
+# Журнал копится в памяти процесса и пишется после ответа не чаще раза
+# в SLOW_QUERY_FLUSH_INTERVAL секунд
+SLOW_QUERY_THRESHOLD = float(os.getenv('SLOW_QUERY_THRESHOLD', '0')) or None
+SLOW_QUERY_FLUSH_INTERVAL = 60
+
+# персональные части страниц (шапка, переключатель лент, кнопка подписки):
+# 'inline' — рендерятся вместе со страницей, 'esi' — подставляются
+# обратным прокси по <esi:include>, 'ajax' — подгружаются скриптом
+FRAGMENTS_MODE = os.getenv('FRAGMENTS_MODE', 'inline')
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
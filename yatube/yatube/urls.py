@@ -3,12 +3,21 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core import views as core_views
+
 urlpatterns = [
     path('', include('posts.urls')),
+    path('admin/profiles/', core_views.profile_list, name='profile_list'),
+    path(
+        'admin/profiles/<str:name>',
+        core_views.profile_file,
+        name='profile_file'
+    ),
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('fragments/', include('core.urls', namespace='core')),
 ]
 
 handler404 = 'core.views.page_not_found'